@@ -1,57 +1,309 @@
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
 import time
 from datetime import datetime, timedelta
 import logging
 import concurrent.futures
+import functools
+import heapq
+import itertools
 import os
-import urllib3
+import ssl
+import threading
+
+import certifi
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # orjson不可用时退回标准库
+    from json import loads as json_loads
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'  # 多线程解析csv
+except ImportError:
+    CSV_ENGINE = 'c'
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# 禁用SSL警告
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# 模块加载时创建一次SSL上下文，所有连接共享CA证书与TLS会话缓存
+SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+
+class SSLContextAdapter(HTTPAdapter):
+    """使用共享SSL上下文的适配器，避免每个连接池重复加载CA证书"""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['ssl_context'] = SSL_CONTEXT
+        return super().init_poolmanager(*args, **kwargs)
+
+# K线数据列名及类型，构造DataFrame时一次性转换，避免逐列推断
+KLINE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume',
+                 'close_time', 'quote_asset_volume', 'number_of_trades',
+                 'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume',
+                 'ignore']
+KLINE_DTYPES = {
+    'timestamp': 'int64',
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'volume': 'float64',
+    'close_time': 'int64',
+    'number_of_trades': 'int64'
+}
+
+# 每个线程复用一个会话，保持与api.binance.com的长连接
+_TLS = threading.local()
+
+# 单个币种内并行获取时间段的线程数
+WINDOW_WORKERS = 4
+
+# klines接口(limit=1000)每次请求的权重，Binance每个IP每分钟权重上限为1200
+KLINES_WEIGHT = 2
+WEIGHT_LIMIT_PER_MINUTE = 1200
+# 响应头X-MBX-USED-WEIGHT-1M超过该值时暂停到下一分钟
+USED_WEIGHT_PAUSE_THRESHOLD = 1000
+
+class WeightRateLimiter:
+    """按请求权重限速的令牌桶，遇到429/418时容量减半（AIMD），已用权重接近上限时暂停到下一分钟"""
+    
+    def __init__(self, weight_per_minute=WEIGHT_LIMIT_PER_MINUTE):
+        self.max_rate = weight_per_minute / 60.0  # 每秒可用权重上限
+        self.rate = self.max_rate
+        self.tokens = float(weight_per_minute)
+        self.max_capacity = float(weight_per_minute)
+        self.capacity = self.max_capacity
+        self.last_refill = time.monotonic()
+        self.used_weight = 0  # 最近一次响应头报告的已用权重
+        self.pause_until = 0.0  # 在该时间点(time.time())之前暂停所有请求
+        self.lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+    
+    def acquire(self, weight=KLINES_WEIGHT):
+        """获取指定权重的令牌，不足时阻塞等待"""
+        while True:
+            with self.lock:
+                pause = self.pause_until - time.time()
+            if pause > 0:
+                time.sleep(pause)
+                continue
+            with self.lock:
+                self._refill()
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = (weight - self.tokens) / self.rate
+            time.sleep(wait)
+    
+    def on_success(self, response=None):
+        """请求成功后线性恢复速率和容量，并根据响应头中的已用权重决定是否暂停"""
+        used = 0
+        if response is not None:
+            try:
+                used = int(response.headers.get("X-MBX-USED-WEIGHT-1M", 0))
+            except (TypeError, ValueError):
+                used = 0
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 60.0)
+            self.capacity = min(self.max_capacity, self.capacity + self.max_capacity / 60.0)
+            self.used_weight = used
+            if used > USED_WEIGHT_PAUSE_THRESHOLD:
+                # 接近每分钟上限，等待到下一分钟权重重置
+                now = time.time()
+                self.pause_until = max(self.pause_until, now + 60 - now % 60)
+                logger.info(f"已用权重 {used}/{WEIGHT_LIMIT_PER_MINUTE}，暂停至下一分钟")
+    
+    def on_throttled(self, response=None):
+        """被限流时速率和容量减半，并清空已积累的令牌；若有Retry-After则按其暂停"""
+        retry_after = 0.0
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("Retry-After") or 0)
+            except (TypeError, ValueError):
+                # Retry-After也可能是HTTP日期等非数字格式，此时只做减速
+                retry_after = 0.0
+        with self.lock:
+            if retry_after > 0:
+                self.pause_until = max(self.pause_until, time.time() + retry_after)
+            self.rate = max(self.max_rate / 64.0, self.rate / 2)
+            self.capacity = max(float(KLINES_WEIGHT), self.capacity / 2)
+            self.tokens = 0.0
+            self.last_refill = time.monotonic()
+            logger.warning(f"触发Binance频率限制，请求速率降至 {self.rate * 60:.0f} 权重/分钟")
+
+# 所有线程共享的限速器
+rate_limiter = WeightRateLimiter()
+
+# 历史数据文件格式：'csv' 或 'parquet'
+# parquet体积更小、读写更快且保留列类型，但需要安装pyarrow；
+# Data_processor.py、Strategy_backtest.py等下游脚本仍读取csv，因此默认保持csv
+HISTORY_FORMAT = 'csv'
+
+# 读取csv历史文件时显式指定数值列类型，跳过类型推断
+HISTORY_CSV_DTYPES = {
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'volume': 'float64'
+}
+
+# 重试策略与适配器在模块加载时创建一次，所有会话共享同一个连接池
+_RETRY = Retry(
+    total=5,  # 最大重试次数
+    backoff_factor=1,  # 重试间隔
+    status_forcelist=[500, 502, 503, 504],  # 需要重试的HTTP状态码
+)
+_ADAPTER = SSLContextAdapter(max_retries=_RETRY, pool_connections=8, pool_maxsize=32)
 
 def create_session_with_retries():
     """创建带有重试机制的会话"""
     session = requests.Session()
     
-    # 配置重试策略
-    retry_strategy = Retry(
-        total=5,  # 最大重试次数
-        backoff_factor=1,  # 重试间隔
-        status_forcelist=[500, 502, 503, 504],  # 需要重试的HTTP状态码
-    )
-    
-    # 创建适配器
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    
-    # 将适配器应用到http和https
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
+    # 将共享适配器应用到http和https
+    session.mount("http://", _ADAPTER)
+    session.mount("https://", _ADAPTER)
     
     return session
 
+def get_session():
+    """获取当前线程的复用会话，首次调用时创建"""
+    session = getattr(_TLS, 'session', None)
+    if session is None:
+        session = create_session_with_retries()
+        _TLS.session = session
+    return session
+
+@functools.lru_cache(maxsize=1)
 def ensure_data_dir():
-    """确保数据保存目录存在"""
+    """确保数据保存目录存在（结果缓存，只在首次调用时检查目录）"""
     data_dir = "crypto_data"
     if not os.path.exists(data_dir):
         os.makedirs(data_dir)
     return data_dir
 
+def history_suffix():
+    """历史数据文件的后缀"""
+    return f"_history.{HISTORY_FORMAT}"
+
+def history_path(symbol):
+    """获取币种历史数据文件路径"""
+    return _history_path(symbol, HISTORY_FORMAT)
+
+@functools.lru_cache(maxsize=1024)
+def _history_path(symbol, history_format):
+    return os.path.join(ensure_data_dir(), f"{symbol.lower()}_history.{history_format}")
+
+def save_history(df, filename):
+    """按文件后缀保存历史数据，内存中的毫秒时间戳在写入时转换为datetime，保持文件格式不变"""
+    if pd.api.types.is_integer_dtype(df['timestamp']):
+        df = df.assign(timestamp=pd.to_datetime(df['timestamp'], unit='ms'))
+    if filename.endswith('.parquet'):
+        df.to_parquet(filename, engine='pyarrow', compression='zstd', index=False)
+    else:
+        df.to_csv(filename, index=False)
+
+def load_history(filename):
+    """按文件后缀读取历史数据，timestamp列统一为int64毫秒时间戳"""
+    if filename.endswith('.parquet'):
+        # parquet保留了列类型，无需再解析时间戳
+        df = pd.read_parquet(filename, engine='pyarrow')
+    else:
+        df = pd.read_csv(filename, engine=CSV_ENGINE, dtype=HISTORY_CSV_DTYPES)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+    df['timestamp'] = df['timestamp'].astype('datetime64[ms]').astype('int64')
+    return df
+
+def save_history_chunk(df, filename, header):
+    """写入一块csv历史数据，header为True时新建文件并写表头，否则追加"""
+    df = df.assign(timestamp=pd.to_datetime(df['timestamp'], unit='ms'))
+    df.to_csv(filename, mode='w' if header else 'a', header=header, index=False)
+
+def merge_into_history_csv(filename, new_df, chunksize=100_000):
+    """
+    将已按时间排序的新数据流式合并进现有csv历史文件
+    
+    现有文件分块读取，与新数据按timestamp归并，时间戳相同时保留现有记录，
+    写入临时文件后原子替换，内存占用只与分块大小相关
+    
+    返回:
+    int: 合并后文件的记录数
+    """
+    reader = pd.read_csv(filename, chunksize=chunksize, dtype=HISTORY_CSV_DTYPES)
+    first_chunk = next(reader, None)
+    if first_chunk is None:
+        save_history(new_df, filename)
+        return len(new_df)
+    
+    columns = list(first_chunk.columns)
+    ts_idx = columns.index('timestamp')
+    
+    def existing_rows():
+        for df in itertools.chain([first_chunk], reader):
+            df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601').astype('datetime64[ms]').astype('int64')
+            yield from df.itertuples(index=False, name=None)
+    
+    new_rows = new_df.reindex(columns=columns).itertuples(index=False, name=None)
+    
+    tmp_filename = f"{filename}.tmp"
+    total = 0
+    last_ts = None
+    batch = []
+    write_header = True
+    
+    for row in heapq.merge(existing_rows(), new_rows, key=lambda r: r[ts_idx]):
+        if row[ts_idx] == last_ts:
+            continue
+        last_ts = row[ts_idx]
+        batch.append(row)
+        if len(batch) >= chunksize:
+            save_history_chunk(pd.DataFrame(batch, columns=columns), tmp_filename, write_header)
+            total += len(batch)
+            batch = []
+            write_header = False
+    
+    if batch or write_header:
+        save_history_chunk(pd.DataFrame(batch, columns=columns), tmp_filename, write_header)
+        total += len(batch)
+    
+    os.replace(tmp_filename, filename)
+    return total
+
+def ms_to_datetime(ms):
+    """毫秒时间戳转换为pd.Timestamp，仅用于展示和报告"""
+    return pd.Timestamp(int(ms), unit='ms')
+
+@functools.lru_cache(maxsize=4096)
+def ymd_to_ms(date_str):
+    """'YYYY-MM-DD'日期字符串转换为毫秒时间戳（结果缓存）"""
+    return int(datetime.strptime(date_str, '%Y-%m-%d').timestamp() * 1000)
+
+@functools.lru_cache(maxsize=4096)
+def _format_ymd(year, month, day):
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+def to_ymd(dt):
+    """datetime/Timestamp转换为'YYYY-MM-DD'字符串（按年月日缓存）"""
+    return _format_ymd(dt.year, dt.month, dt.day)
+
 def get_historical_klines(symbol, interval, start_str, end_str=None):
     """获取历史K线数据"""
     
     endpoint = "https://api.binance.com/api/v3/klines"
     
     # 转换日期字符串为时间戳
-    start_ts = int(datetime.strptime(start_str, '%Y-%m-%d').timestamp() * 1000)
+    start_ts = ymd_to_ms(start_str)
     if end_str:
-        end_ts = int(datetime.strptime(end_str, '%Y-%m-%d').timestamp() * 1000)
+        end_ts = ymd_to_ms(end_str)
     else:
         end_ts = int(time.time() * 1000)
     
@@ -64,36 +316,38 @@ def get_historical_klines(symbol, interval, start_str, end_str=None):
     }
     
     try:
-        # 使用带重试机制的会话
-        session = create_session_with_retries()
+        # 使用当前线程复用的带重试机制的会话
+        session = get_session()
         
-        # 发送请求时禁用SSL验证
-        response = session.get(endpoint, params=params, verify=False)
-        response.raise_for_status()
+        for _ in range(5):
+            rate_limiter.acquire(KLINES_WEIGHT)
+            
+            response = session.get(endpoint, params=params)
+            
+            # 429/418表示触发频率限制，降速后重试
+            if response.status_code in (429, 418):
+                rate_limiter.on_throttled(response)
+                continue
+            
+            response.raise_for_status()
+            rate_limiter.on_success(response)
+            break
+        else:
+            logger.error(f"获取 {symbol} 数据时多次触发频率限制，放弃本次请求")
+            return pd.DataFrame()
         
         # 处理响应数据
-        data = response.json()
-        
-        # 转换为DataFrame
-        df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume',
-                                       'close_time', 'quote_asset_volume', 'number_of_trades',
-                                       'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume',
-                                       'ignore'])
+        data = json_loads(response.content)
         
-        # 转换时间戳
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        
-        # 转换数值类型
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+        # 转换为DataFrame，时间戳保持为int64毫秒，仅在写入文件或生成报告时转换
+        df = pd.DataFrame(data, columns=KLINE_COLUMNS, dtype=object).astype(KLINE_DTYPES)
         
         return df
         
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError, TypeError) as e:
+        # ValueError/TypeError来自JSON解析或列类型转换（响应格式异常）
         logger.error(f"获取数据时出错: {str(e)}")
         return pd.DataFrame()  # 返回空DataFrame而不是None
-    finally:
-        session.close()
 
 def fetch_coin_history(symbol, start_date, end_date, interval='1m'):
     """获取单个币种的历史数据并保存"""
@@ -103,36 +357,47 @@ def fetch_coin_history(symbol, start_date, end_date, interval='1m'):
     start_dt = datetime.strptime(start_date, '%Y-%m-%d')
     end_dt = datetime.strptime(end_date, '%Y-%m-%d')
     
-    data_dir = ensure_data_dir()
-    filename = os.path.join(data_dir, f"{symbol.lower()}_history.csv")
+    filename = history_path(symbol)
     total_records = 0
     
-    # 如果文件已存在，先删除
-    if os.path.exists(filename):
+    # 如果文件已存在，先删除（直接删除，省去一次存在性检查）
+    try:
         os.remove(filename)
+    except FileNotFoundError:
+        pass
     
-    # 分段获取数据
+    # 预先计算所有时间段
+    windows = []
     current_start = start_dt
     while current_start < end_dt:
         current_end = min(current_start + timedelta(days=30), end_dt)
-        
-        logger.info(f"{symbol} 正在获取 {current_start.strftime('%Y-%m-%d')} 至 {current_end.strftime('%Y-%m-%d')} 的数据...")
-        
-        df = get_historical_klines(
-            symbol,
-            interval,
-            current_start.strftime('%Y-%m-%d'),
-            current_end.strftime('%Y-%m-%d')
-        )
-        
-        if not df.empty:
-            # 如果是第一次写入，包含表头；后续追加不包含表头
-            df.to_csv(filename, mode='a', header=not os.path.exists(filename), index=False)
-            total_records += len(df)
-            logger.info(f"{symbol} 已保存 {total_records} 条记录到 {filename}")
-        
+        windows.append((to_ymd(current_start), to_ymd(current_end)))
         current_start = current_end + timedelta(seconds=1)
-        time.sleep(1)  # 避免触发频率限制
+    
+    # 并行获取各时间段数据，频率由共享的rate_limiter控制
+    with concurrent.futures.ThreadPoolExecutor(max_workers=WINDOW_WORKERS) as executor:
+        futures = {}
+        for window_start, window_end in windows:
+            logger.info(f"{symbol} 正在获取 {window_start} 至 {window_end} 的数据...")
+            future = executor.submit(get_historical_klines, symbol, interval, window_start, window_end)
+            futures[future] = (window_start, window_end)
+        
+        results = {}
+        for future in concurrent.futures.as_completed(futures):
+            window = futures[future]
+            df = future.result()
+            if not df.empty:
+                results[window] = df
+                total_records += len(df)
+                logger.info(f"{symbol} 已获取 {window[0]} 至 {window[1]} 的 {len(df)} 条记录，累计 {total_records} 条")
+    
+    # 合并、去重、排序后一次性写入
+    chunks = [results[window] for window in windows if window in results]
+    if chunks:
+        full = pd.concat(chunks, ignore_index=True).drop_duplicates('timestamp').sort_values('timestamp')
+        save_history(full, filename)
+        total_records = len(full)
+        logger.info(f"{symbol} 已保存 {total_records} 条记录到 {filename}")
     
     logger.info(f"{symbol} 全部数据获取完成！总共 {total_records} 条记录")
     return total_records
@@ -143,9 +408,8 @@ def fetch_single_coin(symbol, start_date, end_date, interval='1h'):
     df = get_historical_klines(symbol, interval, start_date, end_date)
     
     if not df.empty:
-        data_dir = ensure_data_dir()
-        filename = os.path.join(data_dir, f"{symbol.lower()}_history.csv")
-        df.to_csv(filename, index=False)
+        filename = history_path(symbol)
+        save_history(df, filename)
         logger.info(f"数据已保存到 {filename}")
         return len(df)
     else:
@@ -157,7 +421,7 @@ def detect_gaps(df, interval='1m'):
     检测数据中的时间缺口
     
     参数:
-    df (DataFrame): 包含时间序列数据的DataFrame
+    df (DataFrame): 包含时间序列数据的DataFrame，timestamp列为int64毫秒时间戳
     interval (str): 数据间隔，如'1m', '1h'等
     
     返回:
@@ -167,7 +431,7 @@ def detect_gaps(df, interval='1m'):
         return []
     
     # 确保数据按时间排序
-    df = df.sort_values('timestamp')
+    ts = np.sort(df['timestamp'].to_numpy(dtype='int64'))
     
     # 根据间隔计算期望的时间差（以分钟为单位）
     interval_minutes = 1  # 默认为1分钟
@@ -178,19 +442,18 @@ def detect_gaps(df, interval='1m'):
     elif interval.endswith('d'):
         interval_minutes = int(interval[:-1]) * 60 * 24
     
-    # 计算连续行之间的时间差
-    df['next_timestamp'] = df['timestamp'].shift(-1)
-    df['time_diff'] = (df['next_timestamp'] - df['timestamp']).dt.total_seconds() / 60
+    # 计算连续行之间的时间差（毫秒）
+    diffs = np.diff(ts)
     
     # 找出超过预期间隔的差距
-    gaps = df[df['time_diff'] > interval_minutes * 1.5]  # 允许一定的误差
+    gap_idx = np.flatnonzero(diffs > interval_minutes * 60_000 * 1.5)  # 允许一定的误差
     
-    # 记录所有时间缺口
+    # 记录所有时间缺口，只对缺口行构造datetime
     gap_list = []
-    for _, row in gaps.iterrows():
-        start_time = row['timestamp']
-        end_time = row['next_timestamp']
-        missing_minutes = round(row['time_diff']) - interval_minutes
+    for i in gap_idx:
+        start_time = ms_to_datetime(ts[i])
+        end_time = ms_to_datetime(ts[i + 1])
+        missing_minutes = round(diffs[i] / 60_000) - interval_minutes
         gap_list.append((start_time, end_time, missing_minutes))
     
     return gap_list
@@ -208,11 +471,12 @@ def fill_gaps(symbol, gaps, interval='1m'):
     int: 成功填补的缺口数量
     """
     filled_count = 0
+    chunks = []
     
     for start_time, end_time, _ in gaps:
         # 将datetime转换为字符串格式
-        start_str = start_time.strftime('%Y-%m-%d')
-        end_str = end_time.strftime('%Y-%m-%d')
+        start_str = to_ymd(start_time)
+        end_str = to_ymd(end_time)
         
         # 如果开始和结束是同一天，尝试获取这一天的完整数据
         if start_str == end_str:
@@ -224,37 +488,43 @@ def fill_gaps(symbol, gaps, interval='1m'):
         df = get_historical_klines(symbol, interval, start_str, end_str)
         
         if not df.empty:
-            # 将数据追加到文件
-            data_dir = ensure_data_dir()
-            filename = os.path.join(data_dir, f"{symbol.lower()}_history.csv")
-            
-            # 读取现有文件
-            if os.path.exists(filename):
-                existing_df = pd.read_csv(filename)
-                
-                # 转换时间戳列为datetime
-                existing_df['timestamp'] = pd.to_datetime(existing_df['timestamp'])
-                
-                # 合并数据并去重
-                combined_df = pd.concat([existing_df, df]).drop_duplicates(subset=['timestamp'])
-                
-                # 按时间排序
-                combined_df = combined_df.sort_values('timestamp')
-                
-                # 保存合并后的数据
-                combined_df.to_csv(filename, index=False)
-                logger.info(f"成功填补 {symbol} 从 {start_str} 到 {end_str} 的数据缺口，新增 {len(df)} 条记录")
-                filled_count += 1
-            else:
-                df.to_csv(filename, index=False)
-                logger.info(f"无现有数据文件，已创建新文件并添加 {len(df)} 条记录")
-                filled_count += 1
-                
-            # 避免请求过于频繁
-            time.sleep(1)
+            chunks.append(df)
+            logger.info(f"已获取 {symbol} 从 {start_str} 到 {end_str} 的缺口数据 {len(df)} 条")
+            filled_count += 1
+    
+    if not chunks:
+        return filled_count
+    
+    filename = history_path(symbol)
+    new_df = pd.concat(chunks, ignore_index=True).drop_duplicates(subset=['timestamp']).sort_values('timestamp')
+    
+    if not os.path.exists(filename):
+        logger.info(f"{symbol} 无现有数据文件，将创建新文件")
+        save_history(new_df, filename)
+        total = len(new_df)
+    elif filename.endswith('.csv'):
+        # 现有文件与缺口数据均已按时间排序，流式归并后一次性写回
+        total = merge_into_history_csv(filename, new_df)
+    else:
+        combined_df = pd.concat([load_history(filename), new_df], ignore_index=True)
+        combined_df = combined_df.drop_duplicates(subset=['timestamp']).sort_values('timestamp')
+        save_history(combined_df, filename)
+        total = len(combined_df)
+    
+    logger.info(f"成功填补 {symbol} 的 {filled_count} 处数据缺口，文件共 {total} 条记录")
     
     return filled_count
 
+def scan_history_file(filename, interval='1m'):
+    """
+    读取历史数据文件并检测时间缺口，在进程池中运行
+    
+    返回:
+    tuple: (起始毫秒时间戳, 结束毫秒时间戳, 缺口列表)
+    """
+    df = load_history(filename)
+    return int(df['timestamp'].min()), int(df['timestamp'].max()), detect_gaps(df, interval)
+
 def check_and_repair_data(symbols=None, interval='1m'):
     """
     检查并修复指定币种的数据缺口
@@ -271,46 +541,60 @@ def check_and_repair_data(symbols=None, interval='1m'):
     
     # 如果没有指定币种，则检查目录下的所有文件
     if symbols is None:
-        # 获取目录中所有以_history.csv结尾的文件
-        files = [f for f in os.listdir(data_dir) if f.endswith('_history.csv')]
-        symbols = [f.replace('_history.csv', '').upper() for f in files]
+        # 获取目录中所有当前格式的历史数据文件
+        suffix = history_suffix()
+        files = [f for f in os.listdir(data_dir) if f.endswith(suffix)]
+        symbols = [f[:-len(suffix)].upper() for f in files]
     
     logger.info(f"开始检查 {len(symbols)} 个币种的数据完整性...")
     
+    filenames = {}
     for symbol in symbols:
-        filename = os.path.join(data_dir, f"{symbol.lower()}_history.csv")
-        
+        filename = history_path(symbol)
         if not os.path.exists(filename):
             logger.warning(f"{symbol} 的数据文件不存在，跳过")
             continue
-        
+        filenames[symbol] = filename
+    
+    # 读取文件与缺口检测是CPU密集型任务，用进程池并行处理各币种
+    scans = {}
+    if filenames:
+        max_workers = min(len(filenames), os.cpu_count() or 1)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(scan_history_file, filename, interval): symbol
+                       for symbol, filename in filenames.items()}
+            for future in concurrent.futures.as_completed(futures):
+                symbol = futures[future]
+                try:
+                    scans[symbol] = future.result()
+                except Exception as e:
+                    scans[symbol] = e
+    
+    # 缺口填补需要访问网络，在主进程中依次进行，共享同一个限速器
+    for symbol, filename in filenames.items():
         logger.info(f"正在检查 {symbol} 的数据...")
         
         try:
-            # 读取数据
-            df = pd.read_csv(filename)
-            
-            # 转换时间戳列为datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            # 检测时间缺口
-            gaps = detect_gaps(df, interval)
+            scan = scans[symbol]
+            if isinstance(scan, Exception):
+                raise scan
+            start_ms, end_ms, gaps = scan
             
             if gaps:
                 total_missing_minutes = sum(minutes for _, _, minutes in gaps)
-                total_duration = (df['timestamp'].max() - df['timestamp'].min()).total_seconds() / 60
+                total_duration = (end_ms - start_ms) / 60_000
                 missing_percentage = (total_missing_minutes / total_duration) * 100
                 
-                logger.info(f"{symbol} 数据范围: {df['timestamp'].min()} 至 {df['timestamp'].max()}")
+                logger.info(f"{symbol} 数据范围: {ms_to_datetime(start_ms)} 至 {ms_to_datetime(end_ms)}")
                 logger.info(f"{symbol} 检测到 {len(gaps)} 处时间缺口，约 {total_missing_minutes} 分钟数据缺失 ({missing_percentage:.2f}%)")
                 
                 # 尝试修复缺口
                 filled_count = fill_gaps(symbol, gaps, interval)
                 
                 results[symbol] = {
-                    "filename": f"{symbol.lower()}_history.csv",
-                    "start_date": df['timestamp'].min(),
-                    "end_date": df['timestamp'].max(),
+                    "filename": os.path.basename(filename),
+                    "start_date": ms_to_datetime(start_ms),
+                    "end_date": ms_to_datetime(end_ms),
                     "gaps": gaps,
                     "total_missing_minutes": total_missing_minutes,
                     "missing_percentage": missing_percentage,
@@ -319,9 +603,9 @@ def check_and_repair_data(symbols=None, interval='1m'):
             else:
                 logger.info(f"{symbol} 数据完整，无缺失")
                 results[symbol] = {
-                    "filename": f"{symbol.lower()}_history.csv",
-                    "start_date": df['timestamp'].min(),
-                    "end_date": df['timestamp'].max(),
+                    "filename": os.path.basename(filename),
+                    "start_date": ms_to_datetime(start_ms),
+                    "end_date": ms_to_datetime(end_ms),
                     "gaps": [],
                     "total_missing_minutes": 0,
                     "missing_percentage": 0,
@@ -1,19 +1,53 @@
+import asyncio
 import json
+import os
 import time
-import urllib.request
+import threading
 import logging
 from datetime import datetime
 import pandas as pd
 import random
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+BINANCE_API_URL = "https://api.binance.com/api/v3"
+
+# 设置请求头，模拟普通浏览器访问
+BINANCE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Referer': 'https://www.binance.com/'
+}
+
+def create_session():
+    """创建复用连接的会话，服务端5xx错误时自动重试"""
+    session = requests.Session()
+    retry_strategy = Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
+    adapter = HTTPAdapter(max_retries=retry_strategy)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def symbol_params(symbols_upper):
+    """单个交易对使用symbol参数，多个交易对使用JSON数组格式的symbols参数，例如 ["BTCUSDT","ETHUSDT"]"""
+    if len(symbols_upper) == 1:
+        return {"symbol": symbols_upper[0]}
+    return {"symbols": json.dumps(symbols_upper, separators=(',', ':'))}
+
 class BinanceRestPriceMonitor:
     def __init__(self, polling_interval=5):
         self.polling_interval = polling_interval  # 轮询间隔(秒)
         self.prices = {}  # 存储价格数据
+        self._stop_event = threading.Event()  # 置位表示停止监控
+        self._async_stop = None  # _poll_loop运行期间为 (事件循环, asyncio.Event)，用于立即打断轮询等待
         self.keep_running = False
         self.use_alternative_api = False  # 是否使用替代API
         self.alternative_api_coins = {
@@ -21,6 +55,58 @@ class BinanceRestPriceMonitor:
             'ETHUSDT': 'ethereum', 
             'SOLUSDT': 'solana'
         }  # CoinGecko API使用的币种ID映射
+        self._session = create_session()  # 复用连接，所有同步请求共享TCP/TLS连接
+        self._history_base = None  # 已合并的历史记录DataFrame，未开始记录时为None
+        self._rows = []  # 尚未合并进history_df的新记录
+        self._unsaved_rows = []  # 尚未写入文件的新记录
+        self._invalid_symbols = set()  # 单独请求仍返回400的交易对（已下架或拼写错误），不再请求
+    
+    @property
+    def keep_running(self):
+        """是否正在监控"""
+        return not self._stop_event.is_set()
+    
+    @keep_running.setter
+    def keep_running(self, value):
+        if value:
+            self._stop_event.clear()
+        else:
+            self._stop_event.set()
+        # 可能在其他线程中调用，通过call_soon_threadsafe通知轮询循环
+        async_stop = self._async_stop
+        if async_stop is not None:
+            loop, stop = async_stop
+            try:
+                loop.call_soon_threadsafe(stop.clear if value else stop.set)
+            except RuntimeError:
+                pass  # 事件循环已关闭
+    
+    @property
+    def history_df(self):
+        """历史价格记录，访问时才把缓冲的新记录合并进DataFrame"""
+        if self._history_base is None:
+            raise AttributeError("history_df")
+        if self._rows:
+            new_df = pd.DataFrame(self._rows)
+            if self._history_base.empty:
+                self._history_base = new_df
+            else:
+                self._history_base = pd.concat([self._history_base, new_df], ignore_index=True)
+            self._rows = []
+        return self._history_base
+    
+    @history_df.setter
+    def history_df(self, df):
+        self._history_base = df
+        self._rows = []
+    
+    def _flush_history(self, history_file, write_header):
+        """将未保存的记录追加写入历史文件，返回之后是否仍需写表头"""
+        if not self._unsaved_rows:
+            return write_header
+        pd.DataFrame(self._unsaved_rows).to_csv(history_file, mode='a', header=write_header, index=False)
+        self._unsaved_rows = []
+        return False
     
     def start_monitoring(self, symbols):
         """开始监控指定的交易对价格"""
@@ -32,20 +118,7 @@ class BinanceRestPriceMonitor:
         logger.info(f"开始监控价格: {', '.join([s.upper() for s in symbols])}")
         
         try:
-            while self.keep_running:
-                for symbol in symbols:
-                    price_data = self.get_price(symbol)
-                    if price_data:
-                        symbol_upper = symbol.upper()
-                        self.prices[symbol_upper] = price_data
-                        
-                        # 显示价格信息
-                        logger.info(f"{symbol_upper} 当前价格 - 买入: {price_data['bid']}, "
-                                  f"卖出: {price_data['ask']}, 中间价: {price_data['mid']:.2f}, "
-                                  f"24h变化: {price_data.get('change_24h', 0):.2f}%")
-                
-                # 等待下一次轮询
-                time.sleep(self.polling_interval)
+            asyncio.run(self._poll_loop(symbols, self._record_price))
         
         except KeyboardInterrupt:
             logger.info("手动中断监控")
@@ -54,6 +127,107 @@ class BinanceRestPriceMonitor:
         finally:
             self.keep_running = False
     
+    def _record_price(self, symbol_upper, price_data):
+        """保存最新价格并输出日志"""
+        self.prices[symbol_upper] = price_data
+        
+        # 显示价格信息
+        logger.info(f"{symbol_upper} 当前价格 - 买入: {price_data['bid']}, "
+                  f"卖出: {price_data['ask']}, 中间价: {price_data['mid']:.2f}, "
+                  f"24h变化: {price_data.get('change_24h', 0):.2f}%")
+    
+    async def _poll_loop(self, symbols, handle_price):
+        """在整个监控期间复用同一个aiohttp会话，按轮询间隔获取价格并交给handle_price处理"""
+        connector = aiohttp.TCPConnector(limit=16, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=10)
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        self._async_stop = (loop, stop)
+        if not self.keep_running:
+            stop.set()
+        
+        try:
+            async with aiohttp.ClientSession(connector=connector, headers=BINANCE_HEADERS, timeout=timeout) as session:
+                while self.keep_running:
+                    # 按截止时间计算下一次轮询，避免轮询耗时导致周期漂移
+                    next_deadline = time.monotonic() + self.polling_interval
+                    try:
+                        batch_prices = await self._poll_once(session, symbols)
+                    except Exception as e:
+                        # 异步请求失败时退回到带重试的同步批量请求
+                        logger.warning(f"异步获取价格失败，改用同步请求重试: {type(e).__name__} - {e}")
+                        batch_prices = await loop.run_in_executor(None, self.get_prices_batch, symbols)
+                    
+                    for symbol in symbols:
+                        symbol_upper = symbol.upper()
+                        price_data = batch_prices.get(symbol_upper)
+                        if price_data:
+                            handle_price(symbol_upper, price_data)
+                    
+                    # 等待下一次轮询，停止监控时立即返回
+                    remaining = next_deadline - time.monotonic()
+                    if remaining > 0:
+                        try:
+                            await asyncio.wait_for(stop.wait(), remaining)
+                        except asyncio.TimeoutError:
+                            pass
+        finally:
+            self._async_stop = None
+    
+    async def _poll_once(self, session, symbols):
+        """并发发送bookTicker和24hr请求，返回 {交易对(大写): 价格数据}"""
+        prices, request_symbols = self._split_invalid(symbols)
+        if not request_symbols:
+            return prices
+        params = symbol_params(request_symbols)
+        
+        book_list, ticker_list = await asyncio.gather(
+            self._fetch_json(session, "ticker/bookTicker", params),
+            self._fetch_json(session, "ticker/24hr", params),
+            return_exceptions=True
+        )
+        if isinstance(book_list, aiohttp.ClientResponseError) and book_list.status == 400:
+            # 400不是临时错误，批量请求时改为逐个交易对请求，只有无效的交易对使用模拟价格
+            if len(request_symbols) > 1:
+                logger.warning(f"批量获取 {', '.join(request_symbols)} 价格返回HTTP 400，改为逐个交易对请求")
+                for result in await asyncio.gather(*(self._poll_once(session, [symbol]) for symbol in request_symbols)):
+                    prices.update(result)
+            else:
+                prices[request_symbols[0]] = self._mark_invalid(request_symbols[0], book_list)
+            return prices
+        if isinstance(book_list, Exception):
+            raise book_list
+        if isinstance(ticker_list, Exception):
+            logger.warning(f"获取 {', '.join(request_symbols)} 24小时价格变化数据时出错: {ticker_list}")
+            ticker_list = None
+        
+        prices.update(self._build_prices(request_symbols, book_list, ticker_list))
+        return prices
+    
+    def _split_invalid(self, symbols):
+        """已确认无效的交易对直接使用模拟价格，返回 (模拟价格字典, 需要请求的交易对列表)"""
+        prices = {}
+        request_symbols = []
+        for symbol in symbols:
+            symbol_upper = symbol.upper()
+            if symbol_upper in self._invalid_symbols:
+                prices[symbol_upper] = self._mock_price(symbol_upper)
+            else:
+                request_symbols.append(symbol_upper)
+        return prices, request_symbols
+    
+    def _mark_invalid(self, symbol_upper, error):
+        """记录单独请求仍返回400的交易对，之后不再请求，返回其模拟价格"""
+        logger.error(f"交易对 {symbol_upper} 无效（HTTP 400），之后使用模拟价格: {error}")
+        self._invalid_symbols.add(symbol_upper)
+        return self._mock_price(symbol_upper)
+    
+    async def _fetch_json(self, session, path, params):
+        """通过aiohttp会话请求Binance接口并解析JSON"""
+        async with session.get(f"{BINANCE_API_URL}/{path}", params=params) as response:
+            response.raise_for_status()
+            return await response.json()
+    
     def get_price_from_coingecko(self, symbol):
         """从CoinGecko API获取价格数据，作为Binance API的替代"""
         try:
@@ -72,38 +246,37 @@ class BinanceRestPriceMonitor:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                 'Accept': 'application/json',
+                'Accept-Encoding': 'gzip, deflate',
                 'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
             }
             
-            # 创建请求对象并添加请求头
-            req = urllib.request.Request(url, headers=headers)
+            response = self._session.get(url, headers=headers, timeout=15)
+            response.raise_for_status()
+            data = response.json()
             
-            with urllib.request.urlopen(req, timeout=15) as response:
-                data = json.loads(response.read().decode())
+            if 'market_data' in data:
+                # 获取USDT价格
+                current_price = data['market_data']['current_price'].get('usd', 0)
+                price_change_24h = data['market_data']['price_change_percentage_24h'] or 0
                 
-                if 'market_data' in data:
-                    # 获取USDT价格
-                    current_price = data['market_data']['current_price'].get('usd', 0)
-                    price_change_24h = data['market_data']['price_change_percentage_24h'] or 0
-                    
-                    # 生成一个小的随机偏差用于买入/卖出价格（模拟交易所买卖差价）
-                    spread = current_price * 0.001  # 0.1%的价差
-                    
-                    price_data = {
-                        "bid": current_price - spread/2,
-                        "ask": current_price + spread/2,
-                        "bid_qty": 1.0,  # 模拟值
-                        "ask_qty": 1.0,  # 模拟值
-                        "mid": current_price,
-                        "timestamp": time.time(),
-                        "change_24h": price_change_24h,
-                        "source": "coingecko"  # 标记数据来源
-                    }
-                    
-                    logger.info(f"已从CoinGecko获取 {symbol} 价格: {current_price} USD, 24h变化: {price_change_24h:.2f}%")
-                    return price_data
-                else:
-                    logger.error(f"CoinGecko API返回数据缺少市场数据部分: {data.get('error', '未知错误')}")
+                # 生成一个小的随机偏差用于买入/卖出价格（模拟交易所买卖差价）
+                spread = current_price * 0.001  # 0.1%的价差
+                
+                price_data = {
+                    "bid": current_price - spread/2,
+                    "ask": current_price + spread/2,
+                    "bid_qty": 1.0,  # 模拟值
+                    "ask_qty": 1.0,  # 模拟值
+                    "mid": current_price,
+                    "timestamp": time.time(),
+                    "change_24h": price_change_24h,
+                    "source": "coingecko"  # 标记数据来源
+                }
+                
+                logger.info(f"已从CoinGecko获取 {symbol} 价格: {current_price} USD, 24h变化: {price_change_24h:.2f}%")
+                return price_data
+            else:
+                logger.error(f"CoinGecko API返回数据缺少市场数据部分: {data.get('error', '未知错误')}")
             
         except Exception as e:
             logger.error(f"从CoinGecko获取 {symbol} 价格时出错: {type(e).__name__} - {e}")
@@ -112,6 +285,22 @@ class BinanceRestPriceMonitor:
     
     def get_price(self, symbol):
         """获取特定交易对的价格数据，仅使用Binance API"""
+        return self.get_prices_batch([symbol]).get(symbol.upper())
+    
+    def get_prices_batch(self, symbols):
+        """批量获取多个交易对的价格数据，每次轮询仅发送bookTicker和24hr两个请求
+        
+        参数:
+        symbols (list): 交易对列表
+        
+        返回:
+        dict: {交易对(大写): 价格数据}
+        """
+        prices, request_symbols = self._split_invalid(symbols)
+        if not request_symbols:
+            return prices
+        params = symbol_params(request_symbols)
+        symbols_text = ', '.join(request_symbols)
         
         # 仅使用Binance API，不使用替代API
         max_retries = 3
@@ -120,86 +309,111 @@ class BinanceRestPriceMonitor:
         for retry in range(max_retries):
             try:
                 # 获取订单簿数据
-                book_ticker_url = f"https://api.binance.com/api/v3/ticker/bookTicker?symbol={symbol.upper()}"
-                
-                # 设置请求头，模拟普通浏览器访问
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Accept': 'application/json',
-                    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                    'Referer': 'https://www.binance.com/'
-                }
+                response = self._session.get(f"{BINANCE_API_URL}/ticker/bookTicker",
+                                             params=params, headers=BINANCE_HEADERS, timeout=10)
+                response.raise_for_status()
+                book_list = response.json()
                 
-                # 创建请求对象并添加请求头
-                req = urllib.request.Request(book_ticker_url, headers=headers)
+                # 获取24小时价格变化数据
+                ticker_list = None
+                try:
+                    ticker_response = self._session.get(f"{BINANCE_API_URL}/ticker/24hr",
+                                                        params=params, headers=BINANCE_HEADERS, timeout=10)
+                    
+                    if ticker_response.status_code == 200:
+                        ticker_list = ticker_response.json()
+                    else:
+                        logger.warning(f"获取 {symbols_text} 24小时价格数据时HTTP状态码异常: {ticker_response.status_code}")
+                except Exception as e:
+                    logger.warning(f"获取 {symbols_text} 24小时价格变化数据时出错: {e}")
                 
-                with urllib.request.urlopen(req, timeout=10) as response:
-                    # 检查HTTP状态码
-                    if response.status == 200:
-                        book_data = json.loads(response.read().decode())
+                prices.update(self._build_prices(request_symbols, book_list, ticker_list))
+                return prices
                         
-                        if "bidPrice" in book_data and "askPrice" in book_data:
-                            price_data = {
-                                "bid": float(book_data["bidPrice"]),
-                                "ask": float(book_data["askPrice"]),
-                                "bid_qty": float(book_data["bidQty"]),
-                                "ask_qty": float(book_data["askQty"]),
-                                "timestamp": time.time(),
-                                "source": "binance"  # 标记数据来源
-                            }
-                            price_data["mid"] = (price_data["bid"] + price_data["ask"]) / 2
-                            
-                            # 获取24小时价格变化数据
-                            try:
-                                ticker_url = f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol.upper()}"
-                                ticker_req = urllib.request.Request(ticker_url, headers=headers)
-                                
-                                with urllib.request.urlopen(ticker_req, timeout=10) as ticker_response:
-                                    if ticker_response.status == 200:
-                                        ticker_data = json.loads(ticker_response.read().decode())
-                                        
-                                        if "priceChangePercent" in ticker_data:
-                                            price_data["change_24h"] = float(ticker_data["priceChangePercent"])
-                                            price_data["open_price"] = float(ticker_data["openPrice"])
-                                            price_data["high_price"] = float(ticker_data["highPrice"])
-                                            price_data["low_price"] = float(ticker_data["lowPrice"])
-                                            price_data["volume"] = float(ticker_data["volume"])
-                                    else:
-                                        logger.warning(f"获取 {symbol} 24小时价格数据时HTTP状态码异常: {ticker_response.status}")
-                                        price_data["change_24h"] = 0.0
-                            except Exception as e:
-                                logger.warning(f"获取 {symbol} 24小时价格变化数据时出错: {e}")
-                                price_data["change_24h"] = 0.0
-                                
-                            return price_data
+            except requests.exceptions.HTTPError as e:
+                status_code = e.response.status_code
+                if status_code == 400:
+                    # 400不是临时错误，不再重试；批量请求时改为逐个交易对请求，只有无效的交易对使用模拟价格
+                    if len(request_symbols) > 1:
+                        logger.warning(f"批量获取 {symbols_text} 价格返回HTTP 400，改为逐个交易对请求")
+                        for symbol in request_symbols:
+                            prices.update(self.get_prices_batch([symbol]))
                     else:
-                        logger.error(f"获取 {symbol} 价格时HTTP状态码异常: {response.status}")
-                        
-            except urllib.error.HTTPError as e:
-                if e.code == 451:
-                    logger.error(f"获取 {symbol} 价格时遇到HTTP 451错误（访问受限）: {e}")
+                        prices[request_symbols[0]] = self._mark_invalid(request_symbols[0], e)
+                    return prices
+                if status_code == 451:
+                    logger.error(f"获取 {symbols_text} 价格时遇到HTTP 451错误（访问受限）: {e}")
                     logger.info("可能是由于地区限制，API访问受限")
                     # 对于451错误，我们仍然尝试重试
-                elif e.code == 429:
-                    logger.warning(f"获取 {symbol} 价格时遇到HTTP 429错误（请求过多）: {e}")
+                elif status_code == 429:
+                    logger.warning(f"获取 {symbols_text} 价格时遇到HTTP 429错误（请求过多）: {e}")
                     # 对于429错误（请求过多），增加延迟时间
                     retry_delay *= 2  # 指数退避
                 else:
-                    logger.error(f"获取 {symbol} 价格时遇到HTTP错误: {e.code} - {e.reason}")
-            except urllib.error.URLError as e:
-                logger.error(f"获取 {symbol} 价格时遇到URL错误: {e.reason}")
+                    logger.error(f"获取 {symbols_text} 价格时遇到HTTP错误: {status_code} - {e.response.reason}")
+            except requests.exceptions.ConnectionError as e:
+                logger.error(f"获取 {symbols_text} 价格时遇到连接错误: {e}")
             except Exception as e:
-                logger.error(f"获取 {symbol} 价格时出错: {type(e).__name__} - {e}")
+                logger.error(f"获取 {symbols_text} 价格时出错: {type(e).__name__} - {e}")
             
             # 只有在非最后一次重试时才等待
             if retry < max_retries - 1:
-                logger.info(f"正在重试获取 {symbol} 价格数据 ({retry+1}/{max_retries})，等待 {retry_delay} 秒...")
+                logger.info(f"正在重试获取 {symbols_text} 价格数据 ({retry+1}/{max_retries})，等待 {retry_delay} 秒...")
                 time.sleep(retry_delay)
                 retry_delay *= 2  # 每次重试后增加延迟
         
-        logger.error(f"从Binance获取 {symbol} 价格失败，已重试 {max_retries} 次")
+        logger.error(f"从Binance获取 {symbols_text} 价格失败，已重试 {max_retries} 次")
         
-        # 返回一个模拟价格数据，避免前端显示出错
+        # 返回模拟价格数据，避免前端显示出错
+        for symbol in request_symbols:
+            prices[symbol] = self._mock_price(symbol)
+        return prices
+    
+    def _build_prices(self, symbols_upper, book_list, ticker_list):
+        """根据bookTicker和24hr接口返回的数组构造价格数据，ticker_list为None表示24小时数据获取失败"""
+        prices = {}
+        timestamp = time.time()
+        # 使用symbol参数请求单个交易对时，接口返回的是对象而不是数组
+        if isinstance(book_list, dict):
+            book_list = [book_list]
+        if isinstance(ticker_list, dict):
+            ticker_list = [ticker_list]
+        for book_data in book_list:
+            if "bidPrice" in book_data and "askPrice" in book_data:
+                price_data = {
+                    "bid": float(book_data["bidPrice"]),
+                    "ask": float(book_data["askPrice"]),
+                    "bid_qty": float(book_data["bidQty"]),
+                    "ask_qty": float(book_data["askQty"]),
+                    "timestamp": timestamp,
+                    "source": "binance"  # 标记数据来源
+                }
+                price_data["mid"] = (price_data["bid"] + price_data["ask"]) / 2
+                prices[book_data["symbol"]] = price_data
+        
+        if ticker_list is None:
+            for price_data in prices.values():
+                price_data["change_24h"] = 0.0
+        else:
+            for ticker_data in ticker_list:
+                price_data = prices.get(ticker_data.get("symbol"))
+                if price_data is not None and "priceChangePercent" in ticker_data:
+                    price_data["change_24h"] = float(ticker_data["priceChangePercent"])
+                    price_data["open_price"] = float(ticker_data["openPrice"])
+                    price_data["high_price"] = float(ticker_data["highPrice"])
+                    price_data["low_price"] = float(ticker_data["lowPrice"])
+                    price_data["volume"] = float(ticker_data["volume"])
+        
+        # 未返回数据的交易对使用模拟价格
+        for symbol in symbols_upper:
+            if symbol not in prices:
+                logger.warning(f"Binance未返回 {symbol} 的价格数据")
+                prices[symbol] = self._mock_price(symbol)
+        
+        return prices
+    
+    def _mock_price(self, symbol):
+        """生成模拟价格数据"""
         mock_price = 0
         if 'BTC' in symbol:
             mock_price = 63000.0
@@ -240,52 +454,52 @@ class BinanceRestPriceMonitor:
         self.keep_running = True
         
         # 创建或加载历史记录文件
+        columns = ['timestamp', 'symbol', 'bid', 'ask', 'mid', 'change_24h']
+        write_header = True
         if history_file:
             try:
                 # 尝试加载现有文件
                 self.history_df = pd.read_csv(history_file)
+                write_header = False
                 logger.info(f"加载历史数据文件: {history_file}")
             except (FileNotFoundError, pd.errors.EmptyDataError):
                 # 创建新文件
-                self.history_df = pd.DataFrame(columns=['timestamp', 'symbol', 'bid', 'ask', 'mid', 'change_24h'])
+                self.history_df = pd.DataFrame(columns=columns)
+                if os.path.exists(history_file):
+                    # 空文件，清空后重新写入表头
+                    open(history_file, 'w').close()
                 logger.info(f"创建新的历史数据文件: {history_file}")
         else:
             # 内存中存储
-            self.history_df = pd.DataFrame(columns=['timestamp', 'symbol', 'bid', 'ask', 'mid', 'change_24h'])
+            self.history_df = pd.DataFrame(columns=columns)
+        self._unsaved_rows = []
         
         logger.info(f"开始监控价格: {', '.join([s.upper() for s in symbols])}")
         
+        def handle_price(symbol_upper, price_data):
+            nonlocal write_header
+            self._record_price(symbol_upper, price_data)
+            
+            # 添加到历史记录
+            new_row = {
+                'timestamp': datetime.fromtimestamp(price_data['timestamp']).strftime('%Y-%m-%d %H:%M:%S'),
+                'symbol': symbol_upper,
+                'bid': price_data['bid'],
+                'ask': price_data['ask'],
+                'mid': price_data['mid'],
+                'change_24h': price_data.get('change_24h', 0)
+            }
+            self._rows.append(new_row)
+            
+            # 每100条新记录追加写入一次文件
+            if history_file:
+                self._unsaved_rows.append(new_row)
+                if len(self._unsaved_rows) >= 100:
+                    write_header = self._flush_history(history_file, write_header)
+                    logger.debug("历史数据已追加保存到文件 (100条记录)")
+        
         try:
-            while self.keep_running:
-                for symbol in symbols:
-                    price_data = self.get_price(symbol)
-                    if price_data:
-                        symbol_upper = symbol.upper()
-                        self.prices[symbol_upper] = price_data
-                        
-                        # 显示价格信息
-                        logger.info(f"{symbol_upper} 当前价格 - 买入: {price_data['bid']}, "
-                                  f"卖出: {price_data['ask']}, 中间价: {price_data['mid']:.2f}, "
-                                  f"24h变化: {price_data.get('change_24h', 0):.2f}%")
-                        
-                        # 添加到历史记录
-                        new_row = {
-                            'timestamp': datetime.fromtimestamp(price_data['timestamp']).strftime('%Y-%m-%d %H:%M:%S'),
-                            'symbol': symbol_upper,
-                            'bid': price_data['bid'],
-                            'ask': price_data['ask'],
-                            'mid': price_data['mid'],
-                            'change_24h': price_data.get('change_24h', 0)
-                        }
-                        self.history_df = pd.concat([self.history_df, pd.DataFrame([new_row])], ignore_index=True)
-                        
-                        # 每100条记录保存一次文件
-                        if history_file and len(self.history_df) % 100 == 0:
-                            self.history_df.to_csv(history_file, index=False)
-                            logger.debug(f"历史数据已保存到文件 ({len(self.history_df)}条记录)")
-                
-                # 等待下一次轮询
-                time.sleep(self.polling_interval)
+            asyncio.run(self._poll_loop(symbols, handle_price))
         
         except KeyboardInterrupt:
             logger.info("手动中断监控")
@@ -294,7 +508,7 @@ class BinanceRestPriceMonitor:
         finally:
             # 保存最终数据
             if history_file:
-                self.history_df.to_csv(history_file, index=False)
+                self._flush_history(history_file, write_header)
                 logger.info(f"历史数据已保存到 {history_file} ({len(self.history_df)}条记录)")
             
             self.keep_running = False
@@ -1,51 +1,126 @@
-import json
 import os
+import marshal
 import platform
+import re
 import sys
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 
 class Config:
-    def __init__(self, data: dict):
+    # 各配置类均通过 from_dict 构建，跳过 __init__；属性集合固定，使用 __slots__
+    # 需要做成员判断的ID另存一份 frozenset，成员判断为 O(1)
+    __slots__ = ('token', 'bot', 'cqhttp_url', 'cqhttp_token', 'proxy', 'toast',
+                 'message_monitor', 'user_dynamic_monitor', 'push', 'push_content')
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        self = object.__new__(cls)
         self.token = data['token']
         self.bot = data['is_bot']
         self.cqhttp_url = data['coolq_url'].rstrip('/')
         self.cqhttp_token = data['coolq_token']
         self.proxy = data['proxy']
         self.toast = data['toast']
-        self.message_monitor = Config.MessageMonitor(data['message_monitor'])
-        self.user_dynamic_monitor = Config.UserDynamicMonitor(data['user_dynamic_monitor'])
-        self.push = Config.Push(data['push'])
-        self.push_content = Config.PushContent(data['push_text'])
+        self.message_monitor = Config.MessageMonitor.from_dict(data['message_monitor'])
+        self.user_dynamic_monitor = Config.UserDynamicMonitor.from_dict(data['user_dynamic_monitor'])
+        self.push = Config.Push.from_dict(data['push'])
+        self.push_content = Config.PushContent.from_dict(data['push_text'])
+        return self
 
     class MessageMonitor:
-        def __init__(self, data: dict):
+        __slots__ = ('users', 'user_ids', 'channel_ids', '_raw_channel_names', '_channel_names')
+
+        @classmethod
+        def from_dict(cls, data: dict):
+            self = object.__new__(cls)
+            # users 为 {用户ID: 显示名}，用于 <user_display_name>
             self.users = data['user_id']
-            self.channel_ids = data['channel']
-            self.channel_names = dict()
-            for guilds in data['channel_name']:
-                channels = self.channel_names.get(guilds[0])
-                if channels is None:
-                    channels = set()
-                    self.channel_names[guilds[0]] = channels
-                for i in range(1, len(guilds)):
-                    channels.add(guilds[i])
+            self.user_ids = frozenset(self.users)
+            self.channel_ids = frozenset(data['channel'])
+            self._raw_channel_names = data['channel_name']
+            self._channel_names = None
+            return self
+
+        @property
+        def channel_names(self) -> dict:
+            # 首次访问时才构建 服务器->频道名 映射
+            if self._channel_names is None:
+                channel_names = dict()
+                for guilds in self._raw_channel_names:
+                    channel_names.setdefault(guilds[0], set()).update(guilds[1:])
+                self._channel_names = {guild: frozenset(channels) for guild, channels in channel_names.items()}
+            return self._channel_names
 
     class UserDynamicMonitor:
-        def __init__(self, data: dict):
+        __slots__ = ('users', 'user_ids', 'servers')
+
+        @classmethod
+        def from_dict(cls, data: dict):
+            self = object.__new__(cls)
             self.users = data['user_id']
-            self.servers = set(data['server'])
+            self.user_ids = frozenset(self.users)
+            self.servers = frozenset(data['server'])
+            return self
 
     class Push:
-        def __init__(self, data: dict):
+        __slots__ = ('groups', 'users', 'group_ids', 'user_ids')
+
+        @classmethod
+        def from_dict(cls, data: dict):
+            self = object.__new__(cls)
+            # 每项为 [号码, 开关, 开关]，保持原样
             self.groups = data['QQ_group']
             self.users = data['QQ_user']
+            self.group_ids = frozenset(item[0] for item in self.groups)
+            self.user_ids = frozenset(item[0] for item in self.users)
+            return self
 
     class PushContent:
-        def __init__(self, data: dict):
+        __slots__ = ('categories', 'message_format', 'user_dynamic_format', 'replace', '_replace_patterns')
+
+        @classmethod
+        def from_dict(cls, data: dict):
+            self = object.__new__(cls)
             self.categories = data["category"]
             self.message_format = data["message_format"]
             self.user_dynamic_format = data["user_dynamic_format"]
             self.replace = data["replace"]
+            # key 为正则表达式，按配置顺序依次替换，构建时一次性编译
+            self._replace_patterns = tuple((re.compile(pattern), repl) for pattern, repl in self.replace.items())
+            return self
+
+        def apply_replace(self, text: str) -> str:
+            for pattern, repl in self._replace_patterns:
+                text = pattern.sub(repl, text)
+            return text
+
+
+# 解析后的配置字典以 marshal 缓存在 config.json 旁，按 (mtime, size) 判断是否过期
+# marshal 只还原基本数据类型，缓存文件被篡改也不会执行代码
+CONFIG_CACHE_SUFFIX = '.cache'
+
+
+def load_cached_config(config_path: str, stat: os.stat_result):
+    try:
+        with open(config_path + CONFIG_CACHE_SUFFIX, 'rb') as f:
+            mtime_ns, size, data = marshal.load(f)
+    except Exception:
+        return None
+    if mtime_ns != stat.st_mtime_ns or size != stat.st_size or not isinstance(data, dict):
+        return None
+    return data
+
+
+def save_cached_config(config_path: str, stat: os.stat_result, data: dict):
+    try:
+        with open(config_path + CONFIG_CACHE_SUFFIX, 'wb') as f:
+            marshal.dump((stat.st_mtime_ns, stat.st_size, data), f)
+    except (OSError, ValueError):
+        pass
 
 
 def read_config() -> Config:
@@ -55,8 +130,13 @@ def read_config() -> Config:
             config_path_temp = input('请输入配置文件路径，空输入则为默认(默认为config.json):\n')
             if config_path_temp != '':
                 config_path = config_path_temp
-            with open(config_path, 'r', encoding='utf8') as f:
-                return Config(json.load(f))
+            stat = os.stat(config_path)
+            data = load_cached_config(config_path, stat)
+            if data is None:
+                with open(config_path, 'rb') as f:
+                    data = json_loads(f.read())
+                save_cached_config(config_path, stat, data)
+            return Config.from_dict(data)
         except FileNotFoundError:
             print('配置文件不存在')
         except KeyboardInterrupt:
@@ -9,6 +9,49 @@ import json
 import glob
 import argparse
 import pytz
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+json_loads = orjson.loads if orjson is not None else json.loads
+
+# Excel 读写引擎：优先使用 calamine 读取、xlsxwriter 写入，未安装时使用 pandas 默认引擎
+try:
+    import python_calamine
+    EXCEL_READ_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_READ_ENGINE = None
+
+try:
+    import xlsxwriter
+    EXCEL_WRITE_ENGINE = 'xlsxwriter'
+except ImportError:
+    EXCEL_WRITE_ENGINE = None
+
+# 安装了 pyarrow 时使用其 CSV 解析器，并以 Arrow 类型存储各列
+try:
+    import pyarrow
+    CSV_READ_OPTIONS = {'engine': 'pyarrow', 'dtype_backend': 'pyarrow'}
+except ImportError:
+    CSV_READ_OPTIONS = {}
+
+# direct_parser 扫描时只需关注的字符：引号、转义、括号和逗号
+SCAN_TOKEN_RE = re.compile(r"[\\'\"{}\[\]()\,]")
+
+# 字典值的分类：np.float64(...)、Timestamp('...')、True/False/None，一次匹配完成
+VALUE_RE = re.compile(r"np\.float64\((.*)\)|Timestamp\('(.*)'\)|(True|False|None)", re.S)
+LITERAL_VALUES = {'True': True, 'False': False, 'None': None}
+
+# 将 pandas 输出的字典/列表字符串改写为 JSON 时需要替换的片段
+JSON_TOKEN_RE = re.compile(r"""'([^'\\"]*)'|np\.float64\(([^()]*)\)|Timestamp\('([^'\\"]*)'\)|\b(True|False|None)\b|["\\]""")
+JSON_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+# Timestamp 改写为 {TIMESTAMP_KEY: "..."}，解析后再还原为 datetime
+TIMESTAMP_KEY = '__timestamp__'
 
 # 列名映射字典
 COLUMN_NAME_MAPPING = {
@@ -60,66 +103,113 @@ COLUMN_NAME_MAPPING = {
     'position': '仓位'
 }
 
+def build_column_name_trie(mapping):
+    """
+    按 '_' 切分映射中的英文名构建前缀树，叶子节点以 None 为键保存中文名
+    """
+    trie = {}
+    for eng_name, chinese_name in mapping.items():
+        node = trie
+        for token in eng_name.split('_'):
+            node = node.setdefault(token, {})
+        node[None] = chinese_name
+    return trie
+
+COLUMN_NAME_TRIE = build_column_name_trie(COLUMN_NAME_MAPPING)
+
+@lru_cache(maxsize=4096)
 def get_chinese_column_name(eng_name):
     """
-    将英文列名转换为中文列名
+    将英文列名转换为中文列名（结果缓存，同名列只翻译一次）
     """
     parts = eng_name.split('_')
+    n = len(parts)
     translated_parts = []
     i = 0
     
-    while i < len(parts):
+    while i < n:
         # 处理数字部分
         if parts[i].isdigit():
             translated_parts.append(parts[i])
             i += 1
             continue
             
-        # 尝试组合多个部分进行翻译
-        for j in range(len(parts), i, -1):
-            combined = '_'.join(parts[i:j])
-            if combined in COLUMN_NAME_MAPPING:
-                translated_parts.append(COLUMN_NAME_MAPPING[combined])
-                i = j
+        # 沿前缀树匹配从 i 开始的最长组合
+        node = COLUMN_NAME_TRIE
+        matched = None
+        matched_end = i
+        j = i
+        while j < n:
+            node = node.get(parts[j])
+            if node is None:
                 break
-        else:
-            # 如果没有找到组合匹配，尝试单个部分
-            if parts[i] in COLUMN_NAME_MAPPING:
-                translated_parts.append(COLUMN_NAME_MAPPING[parts[i]])
-            else:
-                translated_parts.append(parts[i])
+            j += 1
+            if None in node:
+                matched = node[None]
+                matched_end = j
+        
+        if matched is None:
+            # 没有找到匹配，保留原始部分
+            translated_parts.append(parts[i])
             i += 1
+        else:
+            translated_parts.append(matched)
+            i = matched_end
     
     return ''.join(translated_parts)
 
-def clean_numeric_value(value):
+def clean_numeric_column(series):
     """
-    清理数值，去除可能残留的字典或列表结束符号
+    清理整列数值，去除可能残留的字典或列表结束符号，能转换为数值的字符串转为浮点数
     """
-    if isinstance(value, str):
-        # 去除结尾可能的 } 或 ]
-        value = value.rstrip('}]')
-        try:
-            return float(value)
-        except:
-            return value
-    return value
+    if pd.api.types.is_string_dtype(series.dtype):
+        # Arrow 字符串列转为 Python 对象再清理
+        series = series.astype(object)
+    if series.dtype != object:
+        return series
+    # 非字符串单元格得到 NaN，字符串去除结尾可能的 } 或 ]
+    try:
+        stripped = series.str.rstrip('}]')
+    except AttributeError:
+        # 整列没有字符串
+        return series.infer_objects()
+    is_str = stripped.notna()
+    if not is_str.any():
+        return series.infer_objects()
+    numeric = pd.to_numeric(stripped, errors='coerce')
+    cleaned = series.mask(is_str, stripped).mask(is_str & numeric.notna(), numeric)
+    return cleaned.infer_objects()
 
-def process_backtest_results(file_path):
+def read_backtest_file(file_path):
     """
-    读取回测结果文件并处理嵌套数据结构
+    根据扩展名读取回测结果文件
     """
-    # 确定文件类型并读取
     if file_path.endswith('.csv'):
-        df = pd.read_csv(file_path)
+        if CSV_READ_OPTIONS:
+            try:
+                return pd.read_csv(file_path, **CSV_READ_OPTIONS)
+            except ValueError as e:
+                # pyarrow 解析器不接受的文件（行列数不一致、引号不规范等）改用默认的 C 解析器
+                # pyarrow.lib.ArrowInvalid 是 ValueError 的子类
+                print(f"pyarrow 解析CSV失败，改用默认解析器: {e}")
+        return pd.read_csv(file_path)
     elif file_path.endswith('.xlsx') or file_path.endswith('.xls'):
-        df = pd.read_excel(file_path)
+        return pd.read_excel(file_path, engine=EXCEL_READ_ENGINE)
     else:
         raise ValueError("不支持的文件格式，请提供CSV或Excel文件")
+
+def process_backtest_results(source):
+    """
+    处理回测结果中的嵌套数据结构，source 可以是文件路径或已读取的数据框
+    """
+    # 确定文件类型并读取
+    if isinstance(source, pd.DataFrame):
+        df = source
+    else:
+        df = read_backtest_file(source)
     
-    # 复制原始数据框
+    # 复制原始数据框（无效数据在确定掩码后直接从原始数据框中取出）
     processed_df = df.copy()
-    invalid_df = df.copy()  # 创建一个副本用于存储无效数据
     
     # 需要处理的嵌套列名
     nested_columns = ['entry_results', 'entry_points_info', 'total_profit_details']
@@ -148,28 +238,156 @@ def process_backtest_results(file_path):
     # 清理所有包含"风险收益比"、"实际价格"或"持仓时间"的列
     for col in processed_df.columns:
         if '风险收益比' in col or '实际价格' in col or '持仓时间' in col:
-            processed_df[col] = processed_df[col].apply(clean_numeric_value)
+            processed_df[col] = clean_numeric_column(processed_df[col])
     
     # 分离有效和无效数据
     # 检查是否存在关键列来判断数据是否有效
     key_columns = ['入场点位1', '止损点位1', '止盈点位1', '方向']
-    has_valid_data = False
-    
-    for col in key_columns:
-        if col in processed_df.columns:
-            has_valid_data = True
-            # 将所有非空值的行标记为有效数据
-            valid_mask = processed_df[col].notna()
-            processed_df = processed_df[valid_mask]
-            invalid_df = invalid_df[~valid_mask]
-            break
+    columns_set = set(processed_df.columns)
+    key_col = next((col for col in key_columns if col in columns_set), None)
     
-    if not has_valid_data:
+    if key_col is None:
         print("警告：未找到任何关键列来判断数据有效性")
         return processed_df, None
     
+    # 将所有非空值的行标记为有效数据
+    valid_mask = processed_df[key_col].notna()
+    invalid_df = df.loc[~valid_mask].copy()
+    processed_df = processed_df.loc[valid_mask]
+    
     return processed_df, invalid_df
 
+def split_top_level(s):
+    """
+    按最外层的逗号切分字符串，括号和引号内部的逗号不切分
+    """
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    escaped_pos = -1
+    for match in SCAN_TOKEN_RE.finditer(s):
+        pos = match.start()
+        c = s[pos]
+        if quote:
+            if pos == escaped_pos:
+                continue
+            if c == '\\':
+                escaped_pos = pos + 1
+            elif c == quote:
+                quote = None
+        elif c == "'" or c == '"':
+            quote = c
+        elif c in '{[(':
+            depth += 1
+        elif c in '}])':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            parts.append(s[start:pos])
+            start = pos + 1
+    tail = s[start:]
+    if tail.strip():
+        parts.append(tail)
+    return parts
+
+def parse_value(value):
+    """
+    解析字典中单个值的字符串表示
+    """
+    value = value.strip()
+    match = VALUE_RE.fullmatch(value)
+    if match:
+        number, timestamp, literal = match.groups()
+        if literal is not None:
+            return LITERAL_VALUES[literal]
+        if number is not None:
+            # 提取np.float64中的数值
+            try:
+                return float(number)
+            except ValueError:
+                return value
+        # 提取Timestamp中的日期时间
+        try:
+            return datetime.fromisoformat(timestamp)
+        except ValueError:
+            return timestamp
+    if value.startswith('{'):
+        # 嵌套的字典
+        return direct_parser(value)
+    if value.startswith('[') and value.endswith(']'):
+        # 嵌套的列表，逐个元素解析，不只保留字典元素
+        return [parse_value(elem) for elem in split_top_level(value[1:-1])]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '\'"':
+        return value[1:-1]
+    # 尝试转换为数值
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def parse_dict_str(s):
+    """
+    单次扫描解析字典字符串 {'key': value, ...}
+    """
+    dict_obj = {}
+    for item in split_top_level(s[1:-1]):
+        item = item.strip()
+        if not item or item[0] not in '\'"':
+            continue
+        key_end = item.find(item[0], 1)
+        if key_end < 0:
+            continue
+        rest = item[key_end + 1:].lstrip()
+        if not rest.startswith(':'):
+            continue
+        dict_obj[item[1:key_end]] = parse_value(rest[1:])
+    return dict_obj
+
+def json_token(match):
+    """
+    JSON_TOKEN_RE 的替换函数
+    """
+    if match.group(1) is not None:
+        return '"' + match.group(1) + '"'
+    if match.group(2) is not None:
+        return match.group(2)
+    if match.group(3) is not None:
+        return '{"' + TIMESTAMP_KEY + '": "' + match.group(3) + '"}'
+    if match.group(4) is not None:
+        return JSON_LITERALS[match.group(4)]
+    # 字符串中含有双引号或转义字符，交给逐字符扫描处理
+    raise ValueError(match.group(0))
+
+def is_timestamp_marker(obj):
+    return len(obj) == 1 and TIMESTAMP_KEY in obj
+
+def restore_json_value(obj):
+    """
+    将 JSON 解析结果还原为与 parse_value 一致的类型：整数转浮点数、Timestamp 转 datetime
+    """
+    if isinstance(obj, dict):
+        if is_timestamp_marker(obj):
+            value = obj[TIMESTAMP_KEY]
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                return value
+        return {key: restore_json_value(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [restore_json_value(x) for x in obj]
+    if isinstance(obj, int) and not isinstance(obj, bool):
+        return float(obj)
+    return obj
+
+def parse_json_fast(s):
+    """
+    先把字符串改写为 JSON 再用 C 实现的解析器解析，无法改写或解析失败时返回 None
+    """
+    try:
+        return restore_json_value(json_loads(JSON_TOKEN_RE.sub(json_token, s)))
+    except (ValueError, OverflowError):
+        return None
+
 def direct_parser(s):
     """
     直接解析嵌套数据结构的字符串表示
@@ -179,47 +397,11 @@ def direct_parser(s):
     
     # 检查是否为字典格式（单个字典而非列表）
     if s.startswith('{') and s.endswith('}'):
+        result = parse_json_fast(s)
+        if isinstance(result, dict):
+            return result
         try:
-            # 解析单个字典
-            dict_obj = {}
-            
-            # 使用正则表达式匹配键值对
-            key_value_pattern = r"'([^']+)':\s*([^,]+)"
-            pairs = re.findall(key_value_pattern, s)
-            
-            for key, value in pairs:
-                # 处理不同类型的值
-                if value.strip() == 'True':
-                    dict_obj[key] = True
-                elif value.strip() == 'False':
-                    dict_obj[key] = False
-                elif value.strip() == 'None':
-                    dict_obj[key] = None
-                elif 'np.float64' in value:
-                    # 提取np.float64中的数值
-                    match = re.search(r'np\.float64\(([^)]+)\)', value)
-                    if match:
-                        dict_obj[key] = float(match.group(1))
-                    else:
-                        dict_obj[key] = value
-                elif 'Timestamp' in value:
-                    # 提取Timestamp中的日期时间
-                    match = re.search(r"Timestamp\('([^']+)'\)", value)
-                    if match:
-                        try:
-                            dict_obj[key] = datetime.fromisoformat(match.group(1))
-                        except:
-                            dict_obj[key] = match.group(1)
-                    else:
-                        dict_obj[key] = value
-                else:
-                    # 尝试转换为数值
-                    try:
-                        dict_obj[key] = float(value)
-                    except:
-                        dict_obj[key] = value.strip("' ")
-                        
-            return dict_obj
+            return parse_dict_str(s)
         except Exception as e:
             print(f"解析字典错误: {e}")
             return s
@@ -228,60 +410,71 @@ def direct_parser(s):
     if not (s.startswith('[') and s.endswith(']')):
         return s
     
+    result = parse_json_fast(s)
+    if isinstance(result, list):
+        # 最外层列表只保留字典元素
+        return [x for x in result if isinstance(x, dict)]
+    
     try:
-        # 使用正则表达式识别并提取字典对象
-        dict_pattern = r'\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
-        dicts_found = re.findall(dict_pattern, s)
-        
+        # 取出列表最外层的各个字典元素逐一解析
         result_list = []
-        
-        for dict_str in dicts_found:
-            # 解析每个字典
-            dict_obj = {}
-            
-            # 简化: 使用正则表达式匹配键值对
-            key_value_pattern = r"'([^']+)':\s*([^,]+)"
-            pairs = re.findall(key_value_pattern, '{' + dict_str + '}')
-            
-            for key, value in pairs:
-                # 处理不同类型的值
-                if value.strip() == 'True':
-                    dict_obj[key] = True
-                elif value.strip() == 'False':
-                    dict_obj[key] = False
-                elif value.strip() == 'None':
-                    dict_obj[key] = None
-                elif 'np.float64' in value:
-                    # 提取np.float64中的数值
-                    match = re.search(r'np\.float64\(([^)]+)\)', value)
-                    if match:
-                        dict_obj[key] = float(match.group(1))
-                    else:
-                        dict_obj[key] = value
-                elif 'Timestamp' in value:
-                    # 提取Timestamp中的日期时间
-                    match = re.search(r"Timestamp\('([^']+)'\)", value)
-                    if match:
-                        try:
-                            dict_obj[key] = datetime.fromisoformat(match.group(1))
-                        except:
-                            dict_obj[key] = match.group(1)
-                    else:
-                        dict_obj[key] = value
-                else:
-                    # 尝试转换为数值
-                    try:
-                        dict_obj[key] = float(value)
-                    except:
-                        dict_obj[key] = value.strip("' ")
-            
-            result_list.append(dict_obj)
+        for elem in split_top_level(s[1:-1]):
+            elem = elem.strip()
+            if elem.startswith('{') and elem.endswith('}'):
+                result_list.append(parse_dict_str(elem))
         
         return result_list
     except Exception as e:
         print(f"解析列表错误: {e}")
         return s
 
+# direct_parser 返回值的类型编码
+KIND_DICT = 0
+KIND_LIST = 1
+KIND_OTHER = 2
+
+def classify_parsed(parsed):
+    """
+    一次性判断每个解析结果的类型，返回 int8 数组
+    """
+    return np.fromiter(
+        (KIND_DICT if isinstance(x, dict) else KIND_LIST if isinstance(x, list) else KIND_OTHER for x in parsed),
+        dtype=np.int8, count=len(parsed))
+
+def extract_keys(parsed, positions, keys):
+    """
+    单次遍历字典所在位置，同时提取多个键的值，返回 {键: 值列表}，其余位置为 None
+    """
+    size = len(parsed)
+    columns = {key: [None] * size for key in keys}
+    items = list(columns.items())
+    for pos in positions:
+        get = parsed[pos].get
+        for key, values in items:
+            values[pos] = get(key)
+    return columns
+
+# 行数超过该阈值时使用多进程解析嵌套列
+PARALLEL_PARSE_THRESHOLD = 5000
+
+# 为 True 时打印展平过程中的样本值等调试信息
+DEBUG = False
+
+def parse_nested_values(values):
+    """
+    解析一整列嵌套数据；数据量较大时分块交给进程池并行解析
+    """
+    if len(values) > PARALLEL_PARSE_THRESHOLD:
+        workers = os.cpu_count() or 1
+        if workers > 1:
+            chunksize = max(1, len(values) // (workers * 4))
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    return list(executor.map(direct_parser, values, chunksize=chunksize))
+            except (OSError, BrokenProcessPool) as e:
+                print(f"多进程解析失败，改为单进程解析: {e}")
+    return [direct_parser(v) for v in values]
+
 def flatten_nested_column(df, col_name):
     """
     将嵌套列展平为多个单独的列
@@ -290,70 +483,89 @@ def flatten_nested_column(df, col_name):
     if col_name not in df.columns or df[col_name].isnull().all():
         return df
     
-    # 使用直接解析器解析嵌套数据
-    df[col_name] = df[col_name].apply(direct_parser)
+    # 使用直接解析器解析嵌套数据，直接遍历底层数组避免逐行apply（Arrow 字符串列先转为 Python 字符串）
+    parsed = parse_nested_values(df[col_name].astype(object).to_numpy())
     
     # 打印一些解析后的样本，用于调试
-    print(f"解析后的 {col_name} 样本:")
-    first_valid_index = df[col_name].first_valid_index()
-    if first_valid_index is not None:
-        print(f"类型: {type(df.loc[first_valid_index, col_name])}")
-        print(df.loc[first_valid_index, col_name])
+    if DEBUG:
+        print(f"解析后的 {col_name} 样本:")
+        idx = next((i for i, x in enumerate(parsed)
+                    if x is not None and x is not pd.NA and not (isinstance(x, float) and x != x)), None)
+        if idx is not None:
+            print(f"类型: {type(parsed[idx])}")
+            print(parsed[idx])
+    
+    new_columns = {}
+    element_columns = []
+    
+    kinds = classify_parsed(parsed)
     
     # 处理单个字典的情况
-    if df[col_name].apply(lambda x: isinstance(x, dict)).any():
+    dict_positions = np.flatnonzero(kinds == KIND_DICT).tolist()
+    if dict_positions:
         print(f"检测到 {col_name} 列包含字典数据，正在处理...")
         # 获取一个样本字典用于提取键
-        sample_dict = df.loc[df[col_name].apply(lambda x: isinstance(x, dict))].iloc[0][col_name]
-        
-        # 为字典中的每个键创建新列
-        for key in sample_dict.keys():
-            new_col_name = f"{col_name}_{key}"
-            df[new_col_name] = df[col_name].apply(lambda x: x.get(key) if isinstance(x, dict) else None)
-            # 打印创建的列信息
-            print(f"创建列 {new_col_name}, 样本值: {df[new_col_name].iloc[0]}")
+        sample_dict = parsed[dict_positions[0]]
         
-        # 删除原始字典列
-        df = df.drop(columns=[col_name])
-        return df
+        # 为字典中的每个键创建新列，一次遍历提取所有键
+        columns = extract_keys(parsed, dict_positions, sample_dict.keys())
+        for key, values in columns.items():
+            new_columns[f"{col_name}_{key}"] = values
+        return finish_flatten(df, col_name, new_columns, element_columns)
     
     # 处理列表数据
-    valid_list_entries = df[col_name].apply(lambda x: isinstance(x, list) and len(x) > 0)
-    if not valid_list_entries.any():
+    list_positions = np.flatnonzero(kinds == KIND_LIST).tolist()
+    # 获取第一个有效的列表元素作为模板
+    first_elem = next((parsed[pos] for pos in list_positions if parsed[pos]), None)
+    if first_elem is None:
         print(f"警告: {col_name} 列没有有效的列表数据")
+        df[col_name] = pd.Series(parsed, index=df.index, dtype=object)
         return df
     
-    # 获取第一个有效的列表元素作为模板
-    template_index = valid_list_entries[valid_list_entries].index[0]
-    first_elem = df.loc[template_index, col_name]
-    
-    # 对于列表中的每个元素位置创建新列
-    for i in range(len(first_elem)):
+    # 对于列表中的每个元素位置创建新列：元素是字典时按 (位置, 键) 展开，否则保留元素本身
+    size = len(parsed)
+    slots = []
+    for i, sample_elem in enumerate(first_elem):
         prefix = f"{col_name}_{i+1}"
-        
-        # 创建一个函数来提取第i个元素（如果存在）
-        def extract_element(row, idx):
-            if isinstance(row, list) and len(row) > idx:
-                return row[idx]
-            return None
-        
-        # 为第i个元素创建新列
-        df[prefix] = df[col_name].apply(lambda x: extract_element(x, i))
-        
-        # 如果元素是字典，则为字典中的每个键创建新列
-        sample_elem = extract_element(first_elem, i)
         if isinstance(sample_elem, dict):
-            for key in sample_elem.keys():
-                new_col_name = f"{prefix}_{key}"
-                df[new_col_name] = df[prefix].apply(lambda x: x.get(key) if isinstance(x, dict) else None)
+            key_columns = [(key, new_columns.setdefault(f"{prefix}_{key}", [None] * size)) for key in sample_elem.keys()]
+            slots.append((i, key_columns, None))
+        else:
+            element_columns.append(prefix)
+            slots.append((i, None, new_columns.setdefault(prefix, [None] * size)))
+    
+    # 只遍历列表所在的行，同时提取各位置的元素及其各个键，其余位置保持 None
+    for pos in list_positions:
+        x = parsed[pos]
+        length = len(x)
+        for i, key_columns, elements in slots:
+            if i >= length:
+                continue
+            elem = x[i]
+            if elements is not None:
+                elements[pos] = elem
+            elif isinstance(elem, dict):
+                get = elem.get
+                for key, values in key_columns:
+                    values[pos] = get(key)
+    
+    return finish_flatten(df, col_name, new_columns, element_columns)
+
+def finish_flatten(df, col_name, new_columns, element_columns):
+    """
+    删除原始嵌套列并一次性添加展平后的新列
+    """
+    for prefix in element_columns:
+        new_columns[prefix] = pd.Series(new_columns[prefix], index=df.index, dtype=object)
+    # 先构建全部新列再一次性拼接，重名的旧列由新列替换
+    to_drop = [col_name] + [name for name in new_columns if name in df.columns and name != col_name]
+    df = pd.concat([df.drop(columns=to_drop), pd.DataFrame(new_columns, index=df.index)], axis=1, copy=False)
+    if DEBUG:
+        for new_col_name in new_columns:
+            if new_col_name not in element_columns:
                 # 打印创建的列信息
                 print(f"创建列 {new_col_name}, 样本值: {df[new_col_name].iloc[0]}")
-            
-            # 删除中间字典列
-            df = df.drop(columns=[prefix])
-    
-    # 删除原始嵌套列
-    df = df.drop(columns=[col_name])
+    print(f"{col_name} 列已展开为 {len(new_columns)} 列: {', '.join(new_columns)}")
     
     return df
 
@@ -388,21 +600,19 @@ def process_backtest_results_main():
                     print("请确保文件未被其他程序打开，并且您有足够的权限。")
                     return
         
-        # 读取原始文件用于统计列数
-        if file_path.suffix == '.csv':
-            original_df = pd.read_csv(file_path)
-        else:
-            original_df = pd.read_excel(file_path)
+        # 只读取一次原始文件，记录列数后直接交给处理函数
+        original_df = read_backtest_file(str(file_path))
+        original_columns = len(original_df.columns)
             
         # 处理文件
-        result_df, invalid_df = process_backtest_results(str(file_path))
+        result_df, invalid_df = process_backtest_results(original_df)
         
         # 尝试保存处理后的有效数据
         temp_output_path = desktop_path / f"temp_{output_file_name}"
         if file_path.suffix == '.csv':
             result_df.to_csv(temp_output_path, index=False)
         else:
-            result_df.to_excel(temp_output_path, index=False)
+            result_df.to_excel(temp_output_path, index=False, engine=EXCEL_WRITE_ENGINE)
         
         # 如果有无效数据，保存到单独的文件
         if invalid_df is not None and not invalid_df.empty:
@@ -410,7 +620,7 @@ def process_backtest_results_main():
             if file_path.suffix == '.csv':
                 invalid_df.to_csv(temp_invalid_path, index=False)
             else:
-                invalid_df.to_excel(temp_invalid_path, index=False)
+                invalid_df.to_excel(temp_invalid_path, index=False, engine=EXCEL_WRITE_ENGINE)
         
         # 如果临时文件保存成功，重命名为最终文件名
         try:
@@ -419,7 +629,7 @@ def process_backtest_results_main():
                     os.remove(output_path)
                 os.rename(temp_output_path, output_path)
                 print(f"有效数据已保存至：{output_path}")
-                print(f"原始列数: {len(original_df.columns)}, 处理后列数: {len(result_df.columns)}")
+                print(f"原始列数: {original_columns}, 处理后列数: {len(result_df.columns)}")
             
             if invalid_df is not None and not invalid_df.empty and temp_invalid_path.exists():
                 if invalid_path.exists():
@@ -451,38 +661,45 @@ def process_discord_messages_main():
     
     try:
         # 读取JSON文件
-        with open(target_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(target_file, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         
-        # 筛选消息
+        # 筛选消息，同时统计表情和交易策略消息数量
         filtered_messages = []
+        emoji_count = 0
+        strategy_count = 0
         for message in data.get('messages', []):
+            get = message.get
             # 检查是否包含表情或者特定内容
-            has_emojis = bool(message.get('inlineEmojis'))
-            has_strategy = 'Eliz交易策略' in message.get('content', '')
+            inline_emojis = get('inlineEmojis', [])
+            has_emojis = bool(inline_emojis)
+            has_strategy = 'Eliz交易策略' in get('content', '')
             
             if has_emojis or has_strategy:
-                filtered_message = {
+                emoji_count += has_emojis
+                strategy_count += has_strategy
+                filtered_messages.append({
                     'id': message['id'],
                     'timestamp': message['timestamp'],
                     'content': message['content'],
                     'author': message['author']['name'],
                     'has_emojis': has_emojis,
                     'has_strategy': has_strategy,
-                    'inlineEmojis': message.get('inlineEmojis', [])
-                }
-                filtered_messages.append(filtered_message)
+                    'inlineEmojis': inline_emojis
+                })
         
         # 将结果保存到桌面
         output_file = os.path.join(desktop, 'filtered_messages.json')
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(filtered_messages, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            with open(output_file, 'wb') as f:
+                f.write(orjson.dumps(filtered_messages, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(filtered_messages, f, ensure_ascii=False, indent=2)
         
         # 统计信息
-        emoji_count = sum(1 for msg in filtered_messages if msg['has_emojis'])
-        strategy_count = sum(1 for msg in filtered_messages if msg['has_strategy'])
-        
         print(f"筛选结果：")
         print(f"- 包含表情的消息：{emoji_count} 条")
         print(f"- 包含交易策略的消息：{strategy_count} 条")
@@ -531,13 +748,13 @@ def fix_analysis_structure_main():
     
     try:
         # 读取Excel文件
-        df = pd.read_excel(target_file)
+        df = pd.read_excel(target_file, engine=EXCEL_READ_ENGINE)
         
         # 处理数据
         processed_df = process_excel_structure(df)
         
         # 保存处理后的文件
-        processed_df.to_excel(output_file, index=False)
+        processed_df.to_excel(output_file, index=False, engine=EXCEL_WRITE_ENGINE)
         print(f"文件处理完成，已保存到: {output_file}")
         
     except Exception as e:
@@ -810,13 +1027,13 @@ def fix_nested_json_main():
     
     try:
         # 读取Excel文件
-        df = pd.read_excel(target_file)
+        df = pd.read_excel(target_file, engine=EXCEL_READ_ENGINE)
         
         # 处理嵌套数据
         processed_df = process_excel_nested_data(df)
         
         # 保存处理后的文件
-        processed_df.to_excel(output_file, index=False)
+        processed_df.to_excel(output_file, index=False, engine=EXCEL_WRITE_ENGINE)
         print(f"文件处理完成，已保存到: {output_file}")
         
     except Exception as e:
@@ -824,6 +1041,24 @@ def fix_nested_json_main():
         import traceback
         traceback.print_exc()
 
+def safe_parse(x):
+    """
+    安全解析字典/列表字符串：优先按Python字面量解析，失败时使用 direct_parser 处理 np.float64、Timestamp 等表示
+    """
+    if not (isinstance(x, str) and (x.startswith('{') or x.startswith('['))):
+        return x
+    try:
+        return ast.literal_eval(x)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return direct_parser(x)
+
+def first_valid_value(series):
+    """
+    返回列中第一个非空值，整列为空时返回 None
+    """
+    sample = series.dropna().head(1)
+    return sample.iloc[0] if len(sample) else None
+
 def process_excel_nested_data(df):
     """
     处理Excel文件中的嵌套数据
@@ -833,13 +1068,14 @@ def process_excel_nested_data(df):
     
     # 处理可能包含嵌套数据的列
     for col in processed_df.columns:
-        if isinstance(processed_df[col].iloc[0], str) and ('{' in processed_df[col].iloc[0] or '[' in processed_df[col].iloc[0]):
+        first_value = first_valid_value(processed_df[col])
+        if isinstance(first_value, str) and ('{' in first_value or '[' in first_value):
             try:
                 # 尝试解析嵌套数据
-                processed_df[col] = processed_df[col].apply(lambda x: eval(x) if isinstance(x, str) and (x.startswith('{') or x.startswith('[')) else x)
+                processed_df[col] = processed_df[col].apply(safe_parse)
                 
                 # 如果成功解析，展开嵌套数据
-                if isinstance(processed_df[col].iloc[0], dict):
+                if isinstance(first_valid_value(processed_df[col]), dict):
                     new_cols = pd.json_normalize(processed_df[col])
                     processed_df = pd.concat([processed_df.drop(columns=[col]), new_cols], axis=1)
             except:
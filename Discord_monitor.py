@@ -5,19 +5,19 @@ import json
 import sys
 import logging
 import aiohttp
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta, timezone
 import os
 import socket
 from pathlib import Path
-import pandas as pd
 import time
 from typing import Optional, Dict, List, Any
 import re
 from urllib.parse import quote
-import requests
 import hmac
 import base64
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from Log import log_manager
 
 # 获取日志记录器
@@ -79,10 +79,124 @@ sys.modules['discord.voice_client'] = type('voice_client', (), {
 sys.modules['discord.opus'] = dummy_opus
 sys.modules['discord.player'] = DummyModule()
 
+# 安装了orjson时用它序列化消息，未安装时使用标准库json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+json_loads = orjson.loads if orjson is not None else json.loads
+
+# 安装了xlsxwriter时用它写Excel，比openpyxl快，未安装时仍使用openpyxl
+try:
+    import xlsxwriter
+    EXCEL_WRITE_ENGINE = 'xlsxwriter'
+except ImportError:
+    EXCEL_WRITE_ENGINE = 'openpyxl'
+
+# 安装了python-calamine时用它读取Excel，不需要构建openpyxl的单元格对象
+try:
+    import python_calamine
+    EXCEL_READ_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_READ_ENGINE = 'openpyxl'
+
 # 现在导入discord相关模块
 import discord
 from discord.ext import commands
 
+# 已确认存在的目录
+_ensured_dirs = set()
+
+def ensure_dir(path):
+    """
+    创建目录，同一目录只在第一次调用时访问文件系统
+    """
+    if path not in _ensured_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ensured_dirs.add(path)
+
+# 追加写入时从文件末尾回看的字节数
+JSON_TAIL_BYTES = 256
+
+def dump_json_bytes(data):
+    """
+    序列化为2空格缩进的UTF-8 JSON，缩进格式与 json.dump(ensure_ascii=False, indent=2) 相同
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+# 按秒缓存的当前时间字符串
+_now_str_cache = (0, '')
+
+def now_str():
+    """
+    返回当前时间字符串，同一秒内复用已格式化的结果
+    """
+    global _now_str_cache
+    second = int(time.time())
+    cached = _now_str_cache
+    if cached[0] != second:
+        cached = _now_str_cache = (second, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second)))
+    return cached[1]
+
+# 北京时间时区
+_CST = timezone(timedelta(hours=8))
+
+# 需要提取meme数据的频道，以及还要提取```代码块```内容的频道
+_MEME_TARGET_CHANNELS = frozenset({"1283359910788202499", "1242865180371587082"})
+_CODEBLOCK_CHANNELS = frozenset({"1242865180371587082"})
+
+# meme提取用的正则，嵌入描述只需一次扫描，按命名分组区分 [text] 和地址两种格式
+# [text] 用否定字符类代替 .*?，匹配结果相同，且不需要回溯
+_EMBED_RE = re.compile(r'\[(?P<bracket>[^\]\n]*)\]|(?P<addr>0x[a-fA-F0-9]{40})')
+_CODEBLOCK_RE = re.compile(r'```(.*?)```', re.DOTALL)
+
+# 文件名中只保留字母数字（含中文）和 - _ .
+_FILENAME_INVALID_RE = re.compile(r'[^\w.-]')
+
+# 没有附件或嵌入时共用的空序列，序列化后同样是 []，不会被修改
+EMPTY_ITEMS = ()
+
+# meme数据攒够多少行或等待多少秒后写入Excel
+MEME_FLUSH_ROWS = 200
+MEME_FLUSH_INTERVAL = 5
+
+def append_json_array(file_path, records):
+    """
+    向JSON数组文件末尾追加一批记录，只写入新增部分而不重写整个文件
+    文件不存在或为空时新建数组；文件末尾不是数组结尾时抛出ValueError
+    """
+    text = b',\n  '.join(dump_json_bytes(record).replace(b'\n', b'\n  ') for record in records)
+    try:
+        f = open(file_path, 'rb+')
+    except FileNotFoundError:
+        f = open(file_path, 'wb+')
+    with f:
+        size = f.seek(0, os.SEEK_END)
+        tail_start = max(0, size - JSON_TAIL_BYTES)
+        f.seek(tail_start)
+        tail = f.read().rstrip()
+        if not tail:
+            if tail_start:
+                raise ValueError(f"文件末尾不是JSON数组: {file_path}")
+            # 空文件，直接写入新数组
+            f.seek(0)
+            f.write(b'[\n  ' + text + b'\n]')
+            f.truncate()
+            return
+        if not tail.endswith(b']'):
+            raise ValueError(f"文件末尾不是JSON数组: {file_path}")
+        head = tail[:-1].rstrip()
+        if not head and tail_start:
+            raise ValueError(f"文件末尾不是JSON数组: {file_path}")
+        # 覆盖原来的结尾"]"，写入新记录后重新闭合数组
+        f.seek(tail_start + len(head))
+        separator = b'\n  ' if head.endswith(b'[') else b',\n  '
+        f.write(separator + text + b'\n]')
+        f.truncate()
+
 # 配置管理类
 class Config:
     def __init__(self, config_file='config.json'):
@@ -91,11 +205,16 @@ class Config:
         # 添加飞书配置
         self.feishu_webhook = self._config.get("feishu_webhook", "")
         self.feishu_secret = self._config.get("feishu_secret", "")
+        # 监控频道集合，每条消息判断是否监控时直接查集合
+        self._channels_set = frozenset(self.get_channels())
+        # 直接保存频道名称和类型字典，查询时只需一次字典查找
+        self._channel_names = self._config['monitor'].get('channel_names', {})
+        self._channel_types = self._config['monitor'].get('channel_types', {})
 
     def load_config(self, config_file):
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(config_file, 'rb') as f:
+                return json_loads(f.read())
         except Exception as e:
             logging.error(f"加载配置文件失败: {str(e)}")
             # 如果加载失败，创建默认配置
@@ -117,24 +236,30 @@ class Config:
     def get_channels(self):
         return self._config['monitor']['channels']
 
+    def channels_set(self):
+        """获取监控频道ID集合"""
+        return self._channels_set
+
     def get_token(self):
         return self._config['token']
 
     def get_channel_name(self, channel_id):
         """获取频道名称"""
-        return self._config['monitor']['channel_names'].get(channel_id, channel_id)
+        return self._channel_names.get(channel_id, channel_id)
 
     def get_channel_type(self, channel_id):
         """获取频道类型"""
-        return self._config['monitor']['channel_types'].get(channel_id, 'general')
+        return self._channel_types.get(channel_id, 'general')
 
 # 消息处理类
 class MessageProcessor:
-    def __init__(self, config):
+    def __init__(self, config, io_pool=None):
         self.config = config
+        self.io_pool = io_pool  # 文件写入线程池，为None时使用默认线程池
+        self.trading_dir = os.path.join(os.path.dirname(__file__), 'data', 'trading')
         self.message_patterns = {
-            'twitter': r'https?://(?:www\.)?twitter\.com/\w+/status/(\d+)',
-            'trading_signal': r'(买入|卖出|做多|做空).*?([\d.]+)',
+            'twitter': re.compile(r'https?://(?:www\.)?twitter\.com/\w+/status/(\d+)'),
+            'trading_signal': re.compile(r'(买入|卖出|做多|做空).*?([\d.]+)'),
             # 添加更多模式匹配
         }
 
@@ -183,7 +308,7 @@ class MessageProcessor:
         """处理社交媒体消息"""
         try:
             # 检查是否包含 Twitter 链接
-            twitter_urls = re.findall(self.message_patterns['twitter'], message.content)
+            twitter_urls = self.message_patterns['twitter'].findall(message.content)
             
             return {
                 'type': 'social',
@@ -200,27 +325,17 @@ class MessageProcessor:
         """保存交易信息"""
         try:
             # 获取保存路径
-            base_dir = os.path.join(os.path.dirname(__file__), 'data', 'trading')
-            os.makedirs(base_dir, exist_ok=True)
+            ensure_dir(self.trading_dir)
             
             # 按日期保存
-            date_str = datetime.now().strftime('%Y-%m-%d')
-            file_path = os.path.join(base_dir, f'trading_{date_str}.json')
-            
-            # 读取现有数据
-            existing_data = []
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
-            
-            # 添加新数据
-            existing_data.append(trading_info)
+            date_str = now_str()[:10]
+            file_path = os.path.join(self.trading_dir, f'trading_{date_str}.json')
             
-            # 保存数据
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(existing_data, f, ensure_ascii=False, indent=2)
+            # 追加到当天的数组末尾，不再读取和重写整个文件，写入放到线程池中执行
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.io_pool, append_json_array, file_path, [trading_info])
                 
-            logger.info(f"已保存交易信息到: {file_path}")
+            logger.info("已保存交易信息到: %s", file_path)
             
         except Exception as e:
             logger.error(f"保存交易信息时发生错误: {str(e)}")
@@ -230,18 +345,18 @@ class MessageProcessor:
         try:
             # 构建消息数据
             message_data = {
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'timestamp': now_str(),
                 'channel_id': str(message.channel.id),
                 'channel_name': self.config.get_channel_name(str(message.channel.id)),
                 'author': str(message.author),
                 'author_id': str(message.author.id),
                 'content': message.content,
-                'attachments': [att.url for att in message.attachments],
-                'embeds': [embed.to_dict() for embed in message.embeds],
+                'attachments': [att.url for att in message.attachments] if message.attachments else EMPTY_ITEMS,
+                'embeds': [embed.to_dict() for embed in message.embeds] if message.embeds else EMPTY_ITEMS,
                 'type': 'general'
             }
             
-            logger.info(f"处理一般消息: {message_data['content'][:100]}...")
+            logger.info("处理一般消息: %.100s...", message_data['content'])
             return message_data
             
         except Exception as e:
@@ -251,19 +366,21 @@ class MessageProcessor:
 # 设置事件循环
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+else:
+    # 安装了uvloop时使用它的事件循环，未安装时使用asyncio默认循环
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
 
 # 修补 discord.py 的问题
 def patch_discord():
     """修补 discord.py 的问题"""
     def parse_ready_supplemental(self, data):
         """处理 ready_supplemental 事件"""
-        try:
-            self.pending_payments = {}
-            logger.debug("已处理 ready_supplemental 事件")
-            return True
-        except Exception as e:
-            logger.error(f"处理 ready_supplemental 时发生错误: {str(e)}")
-            return False
+        self.pending_payments = {}
+        return True
 
     # 替换原始方法
     discord.state.ConnectionState.parse_ready_supplemental = parse_ready_supplemental
@@ -280,19 +397,44 @@ class SimpleDiscordMonitor(discord.Client):
         super().__init__(
             self_bot=True,  # 必须设置为 True，表示这是一个用户账号
             chunk_guilds_at_startup=False,  # 不需要加载所有成员
-            max_messages=10000,  # 消息缓存上限
+            max_messages=None,  # 不缓存消息对象，消息已由本程序保存到文件
             heartbeat_timeout=60.0,  # 增加心跳超时时间
             guild_ready_timeout=10.0,  # 增加服务器就绪超时时间
             connect_timeout=60.0  # 增加连接超时时间
         )
         
+        # 文件写入线程池，只用一个线程保证同一文件的写入顺序
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='discord_io')
+        # meme数据写入另一个文件，使用独立线程，与消息写入并行
+        self._meme_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='discord_meme')
+        
         # 初始化其他组件
-        self.message_processor = MessageProcessor(config)
-        self.messages = {}
+        self.message_processor = MessageProcessor(config, io_pool=self._io_pool)
         self.last_save_time = {}
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 5
         self.reconnect_delay = 1.0
+        # 各目标频道的meme提取方法，on_message中按频道ID查表
+        self._meme_handlers = {
+            channel_id: self._parse_embed_and_codeblocks if channel_id in _CODEBLOCK_CHANNELS else self._parse_embed_only
+            for channel_id in _MEME_TARGET_CHANNELS
+        }
+        # 监控频道集合，on_message中直接判断
+        self._monitored_channels = config.channels_set()
+        # 各频道等待写入的消息，同一频道排队中的消息合并为一次写入
+        self._pending_messages = {}
+        self._pending_lock = threading.Lock()
+        # 当前账号ID，在on_ready中设置，用于过滤自己发送的消息
+        self._user_id = None
+        
+        # meme数据写入缓冲区
+        self._meme_buffer = []
+        self._meme_flush_task = None
+        # 最近一次写入的meme数据及对应的文件状态，文件未被外部修改时不必重新读取
+        self._meme_history = None
+        self._meme_history_key = None
+        # 关闭流程只执行一次，重复调用close时等待同一个任务
+        self._shutdown_task = None
         
         # 设置保存目录
         base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -308,76 +450,56 @@ class SimpleDiscordMonitor(discord.Client):
         
         logger.info("Discord客户端初始化完成")
 
+    def _channel_file(self, channel_id):
+        """获取频道消息文件路径，文件名只在首次使用时生成"""
+        channel_file = self._channel_files.get(channel_id)
+        if channel_file is None:
+            channel_name = self.config.get_channel_name(channel_id)
+            # 替换文件名中的非法字符
+            filename = _FILENAME_INVALID_RE.sub('', f"{channel_id}-{channel_name}.json")
+            channel_file = self._channel_files[channel_id] = os.path.join(self.save_dir, filename)
+        return channel_file
+
     def _init_message_files(self):
-        """初始化消息文件"""
+        """初始化消息文件，不把历史消息加载到内存"""
+        self._channel_files = {}
         for channel_id in self.config.get_channels():
             channel_name = self.config.get_channel_name(channel_id)
-            filename = f"{channel_id}-{channel_name}.json"
-            filename = "".join(c for c in filename if c.isalnum() or c in ('-', '_', '.'))
-            
-            channel_file = os.path.join(self.save_dir, filename)
+            channel_file = self._channel_file(channel_id)
             try:
-                if os.path.exists(channel_file):
-                    # 检查文件是否为空
-                    if os.path.getsize(channel_file) == 0:
-                        logger.warning(f"频道 {channel_name} ({channel_id}) 的消息文件为空，创建新的空数组")
-                        self.messages[channel_id] = []
-                        with open(channel_file, 'w', encoding='utf-8') as f:
-                            json.dump([], f, ensure_ascii=False, indent=2)
-                    else:
-                        try:
-                            with open(channel_file, 'r', encoding='utf-8') as f:
-                                content = f.read().strip()
-                                if not content:  # 如果文件只包含空白字符
-                                    self.messages[channel_id] = []
-                                    with open(channel_file, 'w', encoding='utf-8') as f:
-                                        json.dump([], f, ensure_ascii=False, indent=2)
-                                else:
-                                    self.messages[channel_id] = json.loads(content)
-                            logger.info(f"已加载频道 {channel_name} ({channel_id}) 的消息文件")
-                        except json.JSONDecodeError:
-                            logger.warning(f"频道 {channel_name} ({channel_id}) 的消息文件格式错误，重置为空数组")
-                            self.messages[channel_id] = []
-                            with open(channel_file, 'w', encoding='utf-8') as f:
-                                json.dump([], f, ensure_ascii=False, indent=2)
-                else:
-                    # 创建新文件
-                    self.messages[channel_id] = []
-                    with open(channel_file, 'w', encoding='utf-8') as f:
-                        json.dump([], f, ensure_ascii=False, indent=2)
+                # 只创建缺失的文件，已有文件不再读取，新消息直接追加到末尾
+                if not os.path.exists(channel_file):
+                    with open(channel_file, 'wb') as f:
+                        f.write(dump_json_bytes([]))
                     logger.info(f"已创建频道 {channel_name} ({channel_id}) 的消息文件")
             except Exception as e:
                 logger.error(f"处理频道 {channel_name} ({channel_id}) 的消息文件时出错: {str(e)}")
-                # 确保即使出错也初始化消息列表
-                self.messages[channel_id] = []
 
-    def is_monitored_channel(self, message):
+    def is_monitored_channel(self, message, channel_id=None):
         """检查消息是否来自被监控的频道"""
-        channel_id = str(message.channel.id)
-        
-        # 检查是否在监控列表中
-        monitored_channels = self.config.get_channels()
-        if channel_id in monitored_channels:
-            logger.info(f"匹配到监控频道ID: {channel_id}")
-            return True
+        if channel_id is None:
+            channel_id = str(message.channel.id)
         
-        logger.info(f"该频道不在监控列表中: {channel_id}")
-        return False
+        # 大部分消息来自未监控的频道，这里只做一次集合查找，不记录日志
+        return channel_id in self.config.channels_set()
 
-    def save_messages(self, channel_id):
-        """保存指定频道的消息到文件"""
+    def save_messages(self, channel_id, messages=None):
+        """将消息追加到指定频道的消息文件，未指定消息时写出该频道排队中的消息"""
         try:
-            # 获取频道名称
-            channel_name = self.config.get_channel_name(channel_id)
-            # 使用频道名称作为文件名
-            filename = f"{channel_id}-{channel_name}.json"
-            # 替换文件名中的非法字符
-            filename = "".join(c for c in filename if c.isalnum() or c in ('-', '_', '.'))
-            
-            channel_file = os.path.join(self.save_dir, filename)
-            with open(channel_file, 'w', encoding='utf-8') as f:
-                json.dump(self.messages[channel_id], f, ensure_ascii=False, indent=2)
-            logger.info(f"消息已保存到频道 {channel_name} ({channel_id})")
+            if messages is None:
+                with self._pending_lock:
+                    messages = self._pending_messages.pop(channel_id)
+            channel_file = self._channel_file(channel_id)
+            try:
+                append_json_array(channel_file, messages)
+            except ValueError:
+                # 保留损坏的文件以便恢复历史消息，再开始新的数组
+                corrupt_file = f"{channel_file}.corrupt-{time.strftime('%Y%m%d%H%M%S')}"
+                os.replace(channel_file, corrupt_file)
+                logger.warning(f"频道 {channel_id} 的消息文件格式错误，已另存为 {corrupt_file}，重置为新数组: {channel_file}")
+                with open(channel_file, 'wb') as f:
+                    f.write(dump_json_bytes(messages))
+            logger.info("%d 条消息已保存到频道 %s: %s", len(messages), channel_id, channel_file)
         except Exception as e:
             logger.error(f"保存频道 {channel_id} 的消息时出错: {str(e)}")
             logger.exception(e)
@@ -388,7 +510,7 @@ class SimpleDiscordMonitor(discord.Client):
             # 创建TCP连接器
             connector = aiohttp.TCPConnector(
                 ssl=False,
-                force_close=True,
+                force_close=False,  # 保持连接复用，force_close=True 时不能设置 keepalive_timeout
                 enable_cleanup_closed=True,
                 ttl_dns_cache=300,
                 limit=10,
@@ -422,7 +544,7 @@ class SimpleDiscordMonitor(discord.Client):
                 logger.info("尝试创建后备HTTP会话...")
                 backup_connector = aiohttp.TCPConnector(
                     ssl=False,
-                    force_close=True,
+                    force_close=False,
                     keepalive_timeout=60.0
                 )
                 backup_session = aiohttp.ClientSession(
@@ -435,6 +557,17 @@ class SimpleDiscordMonitor(discord.Client):
                 logger.error(f"创建后备HTTP会话也失败: {str(backup_error)}")
                 raise
 
+    async def setup_hook(self):
+        """在事件循环中注册退出信号，收到信号后走完整的close流程"""
+        import signal
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, lambda: asyncio.create_task(self.close()))
+            except (NotImplementedError, RuntimeError):
+                # Windows不支持add_signal_handler，Ctrl+C时由run()退出时的close处理
+                pass
+
     async def on_connect(self):
         """当客户端连接到Discord时触发"""
         logger.info("已连接到Discord服务器")
@@ -476,6 +609,7 @@ class SimpleDiscordMonitor(discord.Client):
         try:
             # 重置重连计数
             self.reconnect_attempts = 0
+            self._user_id = self.user.id
             
             logger.info("\n" + "=" * 50)
             logger.info("Discord Monitor 已就绪")
@@ -491,7 +625,7 @@ class SimpleDiscordMonitor(discord.Client):
                 for channel in guild.channels:
                     if isinstance(channel, discord.TextChannel):  # 只显示文字频道
                         channel_id = str(channel.id)
-                        is_monitored = "✓" if channel_id in self.config.get_channels() else " "
+                        is_monitored = "✓" if channel_id in self.config.channels_set() else " "
                         logger.info(f"[{is_monitored}] {channel.name} (ID: {channel_id})")
             
             # 打印监控列表
@@ -508,127 +642,198 @@ class SimpleDiscordMonitor(discord.Client):
 
     async def on_message(self, message):
         try:
-            if message.author == self.user:
+            if message.author.id == self._user_id:
                 return
 
-            if not self.is_monitored_channel(message):
-                return
-                
+            # 频道ID只计算一次，传给后续处理
             channel_id = str(message.channel.id)
-            msg_time = message.created_at + timedelta(hours=8)  # UTC转北京时间
-            
-            # 初始化消息数据
-            message_data = {
-                'meme_data': [],
-                'search_terms': []
-            }
+            if channel_id not in self._monitored_channels:
+                return
             
-            # 处理特定频道
-            if channel_id in ["1283359910788202499", "1242865180371587082"]:
-                logger.info(f"检测到目标频道消息: {channel_id}")
-                
-                # 处理嵌入内容中的描述
-                for embed in message.embeds:
-                    if embed.description:
-                        # 匹配两种格式：
-                        # 1. [text](url) 格式
-                        # 2. 直接是地址格式（包括多行文本中的地址）
-                        matches = re.findall(r'\[(.*?)\]|(0x[a-fA-F0-9]{40})', embed.description)
-                        if matches:
-                            for match in matches:
-                                # 如果是元组，取第一个非空元素
-                                content = next((item for item in match if item), None)
-                                if content:  # 确保内容不为空
-                                    meme_row = {
-                                        '时间': msg_time.strftime("%Y-%m-%d %H:%M:%S"),
-                                        '内容': content,
-                                        '频道ID': channel_id
-                                    }
-                                    message_data['meme_data'].append(meme_row)
-                
-                # 处理普通消息内容中的```内容
-                if channel_id == "1242865180371587082" and message.content:
-                    matches = re.findall(r'```(.*?)```', message.content, re.DOTALL)
-                    if matches:
-                        for match in matches:
-                            meme_row = {
-                                '时间': msg_time.strftime("%Y-%m-%d %H:%M:%S"),
-                                '内容': match.strip(),
-                                '频道ID': channel_id
-                            }
-                            message_data['meme_data'].append(meme_row)
+            # 目标频道在提取meme时顺便序列化嵌入内容，保存消息时直接复用
+            embeds = None
+            # 保存原始消息和保存meme数据写入不同的文件，放在一起并发执行
+            saves = []
+            
+            # 处理特定频道，按频道ID取对应的meme提取方法
+            handler = self._meme_handlers.get(channel_id)
+            if handler is not None:
+                logger.info("检测到目标频道消息: %s", channel_id)
+                # UTC转北京时间，每条消息只格式化一次
+                msg_time = message.created_at.astimezone(_CST).strftime("%Y-%m-%d %H:%M:%S")
+                embeds = []
+                meme_rows = handler(message, channel_id, msg_time, embeds)
                 
                 # 保存meme数据
-                if message_data['meme_data']:
-                    logger.info(f"保存meme数据: {message_data['meme_data']}")
-                    await self.save_meme_data(message_data['meme_data'])
+                if meme_rows:
+                    logger.info("保存meme数据: %s", meme_rows)
+                    saves.append(self.save_meme_data(meme_rows))
             
             # 保存原始消息
-            await self.save_message(message)
+            saves.append(self.save_message(message, channel_id, embeds))
+            for result in await asyncio.gather(*saves, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logger.error(f"保存数据时发生错误: {str(result)}", exc_info=result)
             
         except Exception as e:
             logger.error(f"处理消息时发生错误: {str(e)}")
             logger.exception(e)
 
-    async def save_message(self, message):
-        """保存单条消息"""
+    def _parse_embed_only(self, message, channel_id, msg_time, embeds):
+        """提取嵌入描述中的meme数据，同时把序列化后的嵌入内容放入embeds"""
+        meme_rows = []
+        for embed in message.embeds:
+            embeds.append(embed.to_dict())
+            description = embed.description
+            # 先用子串判断，没有"["和"0x"的描述不可能匹配，跳过正则
+            if description and ('[' in description or '0x' in description):
+                # 匹配两种格式：
+                # 1. [text](url) 格式
+                # 2. 直接是地址格式（包括多行文本中的地址）
+                for match in _EMBED_RE.finditer(description):
+                    # 取实际匹配到的分组
+                    content = match.group(match.lastgroup)
+                    if content:  # 确保内容不为空
+                        meme_rows.append({
+                            '时间': msg_time,
+                            '内容': content,
+                            '频道ID': channel_id
+                        })
+        return meme_rows
+
+    def _parse_embed_and_codeblocks(self, message, channel_id, msg_time, embeds):
+        """提取嵌入描述和消息内容中```代码块```里的meme数据"""
+        meme_rows = self._parse_embed_only(message, channel_id, msg_time, embeds)
+        content = message.content
+        if content and '```' in content:
+            for match in _CODEBLOCK_RE.findall(content):
+                meme_rows.append({
+                    '时间': msg_time,
+                    '内容': match.strip(),
+                    '频道ID': channel_id
+                })
+        return meme_rows
+
+    async def save_message(self, message, channel_id=None, embeds=None):
+        """保存单条消息，embeds为已序列化的嵌入内容，未提供时从消息中生成"""
         try:
-            channel_id = str(message.channel.id)
+            if channel_id is None:
+                channel_id = str(message.channel.id)
+            if embeds is None:
+                embeds = [embed.to_dict() for embed in message.embeds] if message.embeds else EMPTY_ITEMS
             
             # 构建消息数据
             message_data = {
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'timestamp': now_str(),
                 'author': str(message.author),
                 'author_id': str(message.author.id),
                 'content': message.content,
-                'attachments': [att.url for att in message.attachments],
-                'embeds': [embed.to_dict() for embed in message.embeds]
+                'attachments': [att.url for att in message.attachments] if message.attachments else EMPTY_ITEMS,
+                'embeds': embeds
             }
             
-            # 确保频道的消息列表已初始化
-            if channel_id not in self.messages:
-                self.messages[channel_id] = []
-            
-            # 添加到对应频道的消息列表
-            self.messages[channel_id].append(message_data)
+            # 该频道已有排队中的写入时，合并到那次写入中
+            with self._pending_lock:
+                pending = self._pending_messages.get(channel_id)
+                if pending is not None:
+                    pending.append(message_data)
+                    return
+                self._pending_messages[channel_id] = [message_data]
             
-            # 保存到文件
-            self.save_messages(channel_id)
-            
-            logger.info(f"消息已保存到频道 {channel_id}")
+            # 在线程池中追加到文件，不阻塞事件循环
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._io_pool, self.save_messages, channel_id)
             
         except Exception as e:
             logger.error(f"保存消息时出错: {str(e)}")
             logger.exception(e)
 
     async def save_meme_data(self, meme_data: List[dict]):
+        """将meme数据放入缓冲区，攒够一批或超时后统一写入Excel"""
+        self._meme_buffer.extend(meme_data)
+        if len(self._meme_buffer) >= MEME_FLUSH_ROWS:
+            await self.flush_meme_data()
+        elif self._meme_flush_task is None:
+            self._meme_flush_task = asyncio.create_task(self._flush_meme_later())
+
+    async def _flush_meme_later(self):
+        """等待一段时间后写出缓冲区中的meme数据"""
+        await asyncio.sleep(MEME_FLUSH_INTERVAL)
+        self._meme_flush_task = None
+        await self.flush_meme_data()
+
+    async def flush_meme_data(self):
+        """把缓冲区中的meme数据写入Excel，写入在线程池中执行，不阻塞事件循环"""
+        if not self._meme_buffer:
+            return
+        meme_data, self._meme_buffer = self._meme_buffer, []
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._meme_pool, self._write_meme_data, meme_data)
+
+    def _write_meme_data(self, meme_data: List[dict]):
         """保存meme数据到Excel"""
+        # pandas只在这里用到，延迟导入以加快启动
+        import pandas as pd
         try:
             # 确保使用正确的文件扩展名
             meme_path = self.data_dir / 'meme.xlsx'
             
             # 检查目录是否存在，不存在则创建
-            os.makedirs(self.data_dir, exist_ok=True)
+            ensure_dir(self.data_dir)
             
-            # 尝试使用openpyxl引擎
-            if meme_path.exists():
-                try:
-                    # 明确指定引擎为openpyxl
-                    df_meme = pd.read_excel(meme_path, engine='openpyxl')
-                    df_meme = pd.concat([df_meme, pd.DataFrame(meme_data)], ignore_index=True)
-                except Exception as excel_error:
-                    logger.error(f"读取现有Excel文件失败: {excel_error}，创建新文件")
-                    df_meme = pd.DataFrame(meme_data)
-            else:
-                df_meme = pd.DataFrame(meme_data)
+            # 整批新数据一次性构建DataFrame
+            df_new = pd.DataFrame(meme_data)
             
-            # 保存时也指定引擎
-            df_meme.to_excel(str(meme_path), index=False, engine='openpyxl')
-            logger.info(f"成功保存 {len(meme_data)} 条meme数据到Excel: {str(meme_path)}")
+            df_history = None
+            if meme_path.exists():
+                stat = meme_path.stat()
+                if self._meme_history is not None and self._meme_history_key == (stat.st_mtime_ns, stat.st_size):
+                    # 文件仍是上次写入的内容，直接使用内存中的数据
+                    df_history = self._meme_history
+                else:
+                    try:
+                        df_history = pd.read_excel(meme_path, engine=EXCEL_READ_ENGINE)
+                    except Exception as excel_error:
+                        logger.error(f"读取现有Excel文件失败: {excel_error}，创建新文件")
+            
+            # 每批只与历史数据拼接一次
+            df_meme = df_new if df_history is None else pd.concat([df_history, df_new], ignore_index=True)
+            
+            # 先写临时文件再原子替换，读取方不会读到写了一半的文件
+            tmp_path = meme_path.with_name('meme.tmp.xlsx')
+            df_meme.to_excel(str(tmp_path), index=False, engine=EXCEL_WRITE_ENGINE)
+            os.replace(tmp_path, meme_path)
+            stat = meme_path.stat()
+            self._meme_history = df_meme
+            self._meme_history_key = (stat.st_mtime_ns, stat.st_size)
+            logger.info("成功保存 %d 条meme数据到Excel: %s", len(meme_data), meme_path)
         except Exception as e:
             logger.error(f"保存meme数据时出错: {e}")
             logger.exception(e)
 
+    async def close(self):
+        """关闭客户端，并写出所有缓冲和排队中的数据；可重复调用"""
+        if self._shutdown_task is None:
+            self._shutdown_task = asyncio.create_task(self._shutdown())
+        await asyncio.shield(self._shutdown_task)
+
+    async def __aexit__(self, *args):
+        # 父类在已开始关闭时只等待自身的关闭任务，这里确保数据写出完成后再退出
+        await self.close()
+
+    async def _shutdown(self):
+        logger.info("正在关闭客户端...")
+        if self._meme_flush_task is not None:
+            self._meme_flush_task.cancel()
+            self._meme_flush_task = None
+        # 先断开连接，不再接收新消息
+        await super().close()
+        await self.flush_meme_data()
+        # 等待线程池中排队的消息和meme写入全部完成，不阻塞事件循环
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._io_pool.shutdown)
+        await loop.run_in_executor(None, self._meme_pool.shutdown)
+
 
 def main():
     try:
@@ -637,16 +842,6 @@ def main():
         
         client = SimpleDiscordMonitor(config)
         
-        # 添加信号处理
-        import signal
-        def signal_handler(sig, frame):
-            logger.info("正在关闭客户端...")
-            asyncio.create_task(client.close())
-            sys.exit(0)
-        
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
-        
         logger.info("开始运行客户端...")
         client.run(config.get_token())
         
@@ -42,6 +42,38 @@ def save_processed_ids(processed_ids):
         print(f"保存已处理ID失败: {str(e)}")
 
 class FeishuAPI:
+    # 字段名映射：将Excel字段名映射到飞书表格字段名
+    FIELD_MAPPING = {
+        # 基本字段
+        'channel': '频道名称',
+        'timestamp': '时间戳',
+        'message_id': '消息ID',
+        'author': '作者',
+        'author_id': '作者ID',
+        'attachments': '附件',
+        'datetime': '日期时间',
+        
+        # 分析字段 - 移除'analysis.'前缀
+        'analysis.交易币种': '币种',
+        'analysis.方向': '交易方向',
+        'analysis.杠杆': '杠杆',
+        'analysis.入场点位1': '入场点位1',
+        'analysis.入场点位2': '入场点位2',
+        'analysis.入场点位3': '入场点位3',
+        'analysis.止损点位1': '止损点位1',
+        'analysis.止损点位2': '止损点位2',
+        'analysis.止损点位3': '止损点位3',
+        'analysis.止盈点位1': '止盈点位1',
+        'analysis.止盈点位2': '止盈点位2',
+        'analysis.止盈点位3': '止盈点位3',
+        'analysis.分析内容': '分析内容',
+        'analysis.原文': '消息内容',
+        'analysis.翻译': '翻译内容'
+    }
+    
+    # 表格字段信息缓存有效期（秒）
+    FIELDS_CACHE_TTL = 600
+
     def __init__(self, app_id, app_secret):
         self.app_id = app_id
         self.app_secret = app_secret
@@ -49,6 +81,8 @@ class FeishuAPI:
         self.access_token = None
         self.token_expires = 0
         self.existing_messages = set()  # 用于存储已有的消息ID
+        self._fields_cache = {}  # (app_token, table_id) -> 字段信息
+        self._fields_cache_expires = {}
 
     def get_access_token(self):
         """获取访问令牌"""
@@ -100,66 +134,35 @@ class FeishuAPI:
         except Exception as e:
             raise Exception(f"获取字段信息失败: {str(e)}")
 
-    def batch_create_records(self, app_token, table_id, records):
-        """批量创建记录"""
-        url = f"{self.base_url}/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_create"
-        headers = {
-            "Authorization": f"Bearer {self.get_access_token()}",
-            "Content-Type": "application/json"
-        }
-        
-        # 首先获取表格实际字段
+    def _get_schema(self, app_token, table_id):
+        """获取表格字段、字段类型、日期时间字段和有效字段映射，结果按表缓存"""
+        key = (app_token, table_id)
+        if key in self._fields_cache and time.time() < self._fields_cache_expires[key]:
+            return self._fields_cache[key]
+
         print("\n获取飞书表格实际字段...")
-        actual_fields = []
         try:
             fields_info = self.get_table_fields(app_token, table_id)
-            actual_fields = [field.get("field_name") for field in fields_info]
-            field_types = {field.get("field_name"): field.get("type") for field in fields_info}
-            print(f"表格实际字段: {actual_fields}")
-            print(f"字段类型: {field_types}")
         except Exception as e:
             print(f"获取表格字段失败: {str(e)}")
             print("将尝试使用默认字段映射")
+            # 获取失败不缓存，下次调用重新获取；默认假设"时间戳"和"日期时间"是日期时间字段
+            return [], {}, ["时间戳", "日期时间"], dict(self.FIELD_MAPPING)
+
+        actual_fields = [field.get("field_name") for field in fields_info]
+        field_types = {field.get("field_name"): field.get("type") for field in fields_info}
+        print(f"表格实际字段: {actual_fields}")
+        print(f"字段类型: {field_types}")
         
         # 检查字段类型，查看哪些是日期时间类型
-        date_fields = []
-        if 'field_types' in locals() and field_types:
+        if field_types:
             date_fields = [field for field, type_id in field_types.items() if type_id == 5]  # 类型5是日期时间
             print(f"检测到日期时间字段: {date_fields}")
         else:
-            # 默认假设"时间戳"和"日期时间"是日期时间字段
             date_fields = ["时间戳", "日期时间"]
         
-        # 字段名映射：将Excel字段名映射到飞书表格字段名
-        field_mapping = {
-            # 基本字段
-            'channel': '频道名称',
-            'timestamp': '时间戳',
-            'message_id': '消息ID',
-            'author': '作者',
-            'author_id': '作者ID',
-            'attachments': '附件',
-            'datetime': '日期时间',
-            
-            # 分析字段 - 移除'analysis.'前缀
-            'analysis.交易币种': '币种',
-            'analysis.方向': '交易方向',
-            'analysis.杠杆': '杠杆',
-            'analysis.入场点位1': '入场点位1',
-            'analysis.入场点位2': '入场点位2',
-            'analysis.入场点位3': '入场点位3',
-            'analysis.止损点位1': '止损点位1',
-            'analysis.止损点位2': '止损点位2',
-            'analysis.止损点位3': '止损点位3',
-            'analysis.止盈点位1': '止盈点位1',
-            'analysis.止盈点位2': '止盈点位2',
-            'analysis.止盈点位3': '止盈点位3',
-            'analysis.分析内容': '分析内容',
-            'analysis.原文': '消息内容',
-            'analysis.翻译': '翻译内容'
-        }
-        
-        # 如果获取到了实际字段，验证并调整映射
+        # 验证并调整映射
+        field_mapping = dict(self.FIELD_MAPPING)
         if actual_fields:
             valid_mapping = {}
             for source, target in field_mapping.items():
@@ -167,10 +170,24 @@ class FeishuAPI:
                     valid_mapping[source] = target
                 else:
                     print(f"警告: 字段 '{target}' 在飞书表格中不存在")
-            
-            # 更新映射
             field_mapping = valid_mapping
             print(f"有效字段映射: {field_mapping}")
+
+        schema = (actual_fields, field_types, date_fields, field_mapping)
+        self._fields_cache[key] = schema
+        self._fields_cache_expires[key] = time.time() + self.FIELDS_CACHE_TTL
+        return schema
+
+    def batch_create_records(self, app_token, table_id, records):
+        """批量创建记录"""
+        url = f"{self.base_url}/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_create"
+        headers = {
+            "Authorization": f"Bearer {self.get_access_token()}",
+            "Content-Type": "application/json"
+        }
+        
+        # 表格字段信息在缓存有效期内复用，不再每次请求
+        actual_fields, field_types, date_fields, field_mapping = self._get_schema(app_token, table_id)
         
         # 应用字段映射
         mapped_records = []
@@ -302,6 +319,8 @@ class FeishuAPI:
                     print(f"第 {current_batch} 批成功创建 {created_count} 条记录")
                     print(f"当前总计已创建: {total_created} 条记录")
                 else:
+                    # 表格结构可能已变化，清除字段缓存，下次重新获取
+                    self._fields_cache.pop((app_token, table_id), None)
                     error_msg = f"第 {current_batch} 批创建失败，错误信息: {result}"
                     print(error_msg)
                     raise Exception(error_msg)
@@ -435,6 +435,8 @@ class SimpleDiscordMonitor(discord.Client):  # 改为继承 discord.Client
         self.message_processor = MessageProcessor(config)
         self.messages = {}
         self.last_save_time = {}
+        # 代理检测复用的会话，首次检测时创建
+        self._probe_session = None
         
         logger.info("配置文件加载成功")
         
@@ -792,18 +794,26 @@ class SimpleDiscordMonitor(discord.Client):  # 改为继承 discord.Client
         """检查代理是否可用"""
         try:
             proxy = self.config.get_proxy()
-            async with aiohttp.ClientSession() as session:
-                async with session.get('http://httpbin.org/ip', proxy=proxy) as response:
-                    if response.status == 200:
-                        logger.info(f"代理可用: {proxy}")
-                        return True
-                    else:
-                        logger.error(f"代理不可用: {proxy}")
-                        return False
+            if self._probe_session is None or self._probe_session.closed:
+                self._probe_session = aiohttp.ClientSession()
+            async with self._probe_session.get('http://httpbin.org/ip', proxy=proxy) as response:
+                if response.status == 200:
+                    logger.info(f"代理可用: {proxy}")
+                    return True
+                else:
+                    logger.error(f"代理不可用: {proxy}")
+                    return False
         except Exception as e:
             logger.error(f"检查代理时发生错误: {str(e)}")
             return False
 
+    async def close(self):
+        """关闭客户端时一并关闭代理检测会话"""
+        if self._probe_session is not None:
+            await self._probe_session.close()
+            self._probe_session = None
+        await super().close()
+
 def main():
     try:
         logger.info("正在启动Discord监控...")